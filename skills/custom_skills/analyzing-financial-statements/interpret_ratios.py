@@ -3,7 +3,84 @@
 提供行业基准和背景分析。
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+
+# 评级标签表，interpret_ratio_vectorized 返回的索引即指向此表
+RATING_LABELS = (
+    "N/A",
+    "较差",
+    "可接受",
+    "良好",
+    "优秀",
+    "可能被低估",
+    "公允价值",
+    "增长溢价",
+    "昂贵",
+)
+_NOT_RATED = 0
+_POOR = 1
+
+# 越高越好：基准升序排列，value >= 阈值即进入更高档位
+_HIGHER_IS_BETTER = (
+    ("acceptable", "good", "excellent"),
+    "right",
+    np.array([1, 2, 3, 4], dtype=np.int8),
+    {
+        1: "低于行业标准 - 需要关注",
+        2: "符合行业标准",
+        3: "在{industry}行业中表现优于平均水平",
+        4: "业绩显著超过行业标准",
+    },
+)
+
+# 越低越好：value <= 阈值即保持在更好档位
+_LOWER_IS_BETTER = (
+    ("excellent", "good", "acceptable"),
+    "left",
+    np.array([4, 3, 2, 1], dtype=np.int8),
+    {
+        4: "非常保守的资本结构",
+        3: "健康的杠杆水平",
+        2: "适度杠杆",
+        1: "高杠杆 - 潜在风险",
+    },
+)
+
+# 市盈率：取决于背景
+_VALUATION = (
+    ("undervalued", "fair", "growth"),
+    "right",
+    np.array([5, 6, 7, 8], dtype=np.int8),
+    {
+        5: "交易低于典型的{industry}倍数",
+        6: "与行业平均水平一致",
+        7: "市场定价包含增长预期",
+        8: "相对于行业估值较高",
+    },
+)
+
+# 比率名称 -> (基准键, searchsorted 方向, 档位 -> 评级索引, 评级索引 -> 消息模板)
+_RATING_RULES = {
+    "current_ratio": _HIGHER_IS_BETTER,
+    "roe": _HIGHER_IS_BETTER,
+    "gross_margin": _HIGHER_IS_BETTER,
+    "debt_to_equity": _LOWER_IS_BETTER,
+    "pe_ratio": _VALUATION,
+}
+
+# 与 RATING_LABELS 一一对应的评分查找表
+_RATING_SCORES = np.array([2, 1, 2, 3, 4, 3, 3, 2, 1], dtype=np.int8)
+
+# 平均分阈值与对应的整体健康状况
+_HEALTH_THRESHOLDS = np.array([1.5, 2.5, 3.5])
+_HEALTH_LEVELS = (
+    ("较差", "存在重大财务挑战，需要立即关注"),
+    ("一般", "财务指标混合 - 在几个方面需要关注"),
+    ("良好", "整体财务状况健康，在某些方面还有改进空间"),
+    ("优秀", "公司在大多数指标上显示出强劲的财务健康状况"),
+)
 
 
 class RatioInterpreter:
@@ -78,77 +155,53 @@ class RatioInterpreter:
         Returns:
             包含解释详情的字典
         """
-        interpretation = {
-            "value": value,
-            "rating": "N/A",
-            "message": "",
-            "recommendation": "",
-            "benchmark_comparison": {},
-        }
+        rating_idx = int(self.interpret_ratio_vectorized(ratio_name, [value])[0])
+        return self._build_interpretation(ratio_name, value, rating_idx)
 
-        if ratio_name in self.benchmarks:
-            benchmark = self.benchmarks[ratio_name]
-            interpretation["benchmark_comparison"] = benchmark
-
-            # 基于基准确定评级
-            if ratio_name in ["current_ratio", "roe", "gross_margin"]:
-                # 越高越好
-                if value >= benchmark["excellent"]:
-                    interpretation["rating"] = "优秀"
-                    interpretation["message"] = (
-                        "业绩显著超过行业标准"
-                    )
-                elif value >= benchmark["good"]:
-                    interpretation["rating"] = "良好"
-                    interpretation["message"] = (
-                        f"在{self.industry}行业中表现优于平均水平"
-                    )
-                elif value >= benchmark["acceptable"]:
-                    interpretation["rating"] = "可接受"
-                    interpretation["message"] = "符合行业标准"
-                else:
-                    interpretation["rating"] = "较差"
-                    interpretation["message"] = "低于行业标准 - 需要关注"
-
-            elif ratio_name == "debt_to_equity":
-                # 越低越好
-                if value <= benchmark["excellent"]:
-                    interpretation["rating"] = "优秀"
-                    interpretation["message"] = "非常保守的资本结构"
-                elif value <= benchmark["good"]:
-                    interpretation["rating"] = "良好"
-                    interpretation["message"] = "健康的杠杆水平"
-                elif value <= benchmark["acceptable"]:
-                    interpretation["rating"] = "可接受"
-                    interpretation["message"] = "适度杠杆"
-                else:
-                    interpretation["rating"] = "较差"
-                    interpretation["message"] = "高杠杆 - 潜在风险"
-
-            elif ratio_name == "pe_ratio":
-                # 取决于背景
-                if value > 0:
-                    if value < benchmark["undervalued"]:
-                        interpretation["rating"] = "可能被低估"
-                        interpretation["message"] = (
-                            f"交易低于典型的{self.industry}倍数"
-                        )
-                    elif value < benchmark["fair"]:
-                        interpretation["rating"] = "公允价值"
-                        interpretation["message"] = "与行业平均水平一致"
-                    elif value < benchmark["growth"]:
-                        interpretation["rating"] = "增长溢价"
-                        interpretation["message"] = "市场定价包含增长预期"
-                    else:
-                        interpretation["rating"] = "昂贵"
-                        interpretation["message"] = "相对于行业估值较高"
-
-        # 添加具体建议
-        interpretation["recommendation"] = self._get_recommendation(
-            ratio_name, interpretation["rating"]
-        )
+    def interpret_ratio_vectorized(self, ratio_name: str, values: Sequence[float]) -> np.ndarray:
+        """
+        批量确定同一比率多个数值的评级。
 
-        return interpretation
+        Args:
+            ratio_name: 比率的名称
+            values: 计算的比率值序列
+
+        Returns:
+            指向 RATING_LABELS 的评级索引数组
+        """
+        values = np.asarray(values, dtype=float)
+        rule = _RATING_RULES.get(ratio_name)
+        if rule is None or ratio_name not in self.benchmarks:
+            return np.full(values.shape, _NOT_RATED, dtype=np.int8)
+
+        keys, side, ratings, _ = rule
+        benchmark = self.benchmarks[ratio_name]
+        thresholds = np.array([benchmark[key] for key in keys], dtype=float)
+        rating_indices = ratings[np.searchsorted(thresholds, values, side=side)]
+        # searchsorted 把 NaN 排在所有阈值之后；NaN 与阈值的比较都不成立，应评为较差
+        rating_indices = np.where(np.isnan(values), _POOR, rating_indices).astype(np.int8)
+
+        if ratio_name == "pe_ratio":
+            # 非正市盈率没有参考意义
+            rating_indices = np.where(values > 0, rating_indices, _NOT_RATED).astype(np.int8)
+
+        return rating_indices
+
+    def _build_interpretation(
+        self, ratio_name: str, value: float, rating_idx: int
+    ) -> Dict[str, Any]:
+        """根据评级索引组装解释字典。"""
+        rating = RATING_LABELS[rating_idx]
+        rule = _RATING_RULES.get(ratio_name)
+        message = rule[3].get(rating_idx, "") if rule else ""
+
+        return {
+            "value": value,
+            "rating": rating,
+            "message": message.format(industry=self.industry),
+            "recommendation": self._get_recommendation(ratio_name, rating),
+            "benchmark_comparison": self.benchmarks.get(ratio_name, {}),
+        }
 
     def _get_recommendation(self, ratio_name: str, rating: str) -> str:
         """基于比率和评级生成可操作的建议。"""
@@ -282,14 +335,28 @@ def perform_comprehensive_analysis(
         "recommendations": [],
     }
 
-    # 分析当前比率
-    for category, category_ratios in ratios.items():
-        analysis["current_analysis"][category] = {}
-        for ratio_name, value in category_ratios.items():
-            if isinstance(value, (int, float)):
-                analysis["current_analysis"][category][ratio_name] = interpreter.interpret_ratio(
-                    ratio_name, value
-                )
+    # 分析当前比率：展平后按比率名称分组，每组只做一次批量评级
+    flat = [
+        (category, ratio_name, value)
+        for category, category_ratios in ratios.items()
+        for ratio_name, value in category_ratios.items()
+        if isinstance(value, (int, float))
+    ]
+    positions_by_name: Dict[str, List[int]] = {}
+    for position, (_, ratio_name, _) in enumerate(flat):
+        positions_by_name.setdefault(ratio_name, []).append(position)
+
+    rating_indices = np.empty(len(flat), dtype=np.int8)
+    for ratio_name, positions in positions_by_name.items():
+        rating_indices[positions] = interpreter.interpret_ratio_vectorized(
+            ratio_name, [flat[position][2] for position in positions]
+        )
+
+    analysis["current_analysis"] = {category: {} for category in ratios}
+    for (category, ratio_name, value), rating_idx in zip(flat, rating_indices):
+        analysis["current_analysis"][category][ratio_name] = interpreter._build_interpretation(
+            ratio_name, value, int(rating_idx)
+        )
 
     # 如果提供历史数据，执行趋势分析
     if historical_data:
@@ -300,7 +367,7 @@ def perform_comprehensive_analysis(
                 )
 
         # 生成整体健康状况评估
-    analysis["overall_health"] = _assess_overall_health(analysis["current_analysis"])
+    analysis["overall_health"] = _assess_overall_health(rating_indices)
 
     # 生成关键建议
     analysis["recommendations"] = _generate_key_recommendations(analysis)
@@ -311,41 +378,13 @@ def perform_comprehensive_analysis(
     return analysis
 
 
-def _assess_overall_health(current_analysis: Dict[str, Any]) -> Dict[str, str]:
-    """基于比率分析评估整体财务健康状况。"""
-    ratings = []
-    for category, category_analysis in current_analysis.items():
-        for ratio_name, ratio_analysis in category_analysis.items():
-            if "rating" in ratio_analysis:
-                ratings.append(ratio_analysis["rating"])
-
-    # 简单评分系统
-    score_map = {
-        "优秀": 4,
-        "良好": 3,
-        "可接受": 2,
-        "较差": 1,
-        "公允价值": 3,
-        "可能被低估": 3,
-        "增长溢价": 2,
-        "昂贵": 1,
-    }
-
-    scores = [score_map.get(rating, 2) for rating in ratings]
-    avg_score = sum(scores) / len(scores) if scores else 0
-
-    if avg_score >= 3.5:
-        health = "优秀"
-        message = "公司在大多数指标上显示出强劲的财务健康状况"
-    elif avg_score >= 2.5:
-        health = "良好"
-        message = "整体财务状况健康，在某些方面还有改进空间"
-    elif avg_score >= 1.5:
-        health = "一般"
-        message = "财务指标混合 - 在几个方面需要关注"
-    else:
-        health = "较差"
-        message = "存在重大财务挑战，需要立即关注"
+def _assess_overall_health(rating_indices: np.ndarray) -> Dict[str, str]:
+    """基于比率评级索引评估整体财务健康状况。"""
+    # 简单评分系统：按评级索引查表，未评级按 2 分计
+    scores = _RATING_SCORES[rating_indices]
+    avg_score = float(scores.mean()) if scores.size else 0.0
+    health_idx = int(np.searchsorted(_HEALTH_THRESHOLDS, avg_score, side="right"))
+    health, message = _HEALTH_LEVELS[health_idx]
 
     return {"status": health, "message": message, "score": f"{avg_score:.1f}/4.0"}
 
@@ -3,50 +3,145 @@
 为Excel、PowerPoint和PDF文档应用一致的品牌。
 """
 
-from typing import Dict, Any, List
+import functools
+import re
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 
+import numpy as np
 
-class BrandFormatter:
-    """将企业品牌指南应用于文档。"""
 
-    # 品牌颜色定义
-    COLORS = {
-        "primary": {
-            "acme_blue": {"hex": "#0066CC", "rgb": (0, 102, 204)},
-            "acme_navy": {"hex": "#003366", "rgb": (0, 51, 102)},
-            "white": {"hex": "#FFFFFF", "rgb": (255, 255, 255)},
-        },
-        "secondary": {
-            "success_green": {"hex": "#28A745", "rgb": (40, 167, 69)},
-            "warning_amber": {"hex": "#FFC107", "rgb": (255, 193, 7)},
-            "error_red": {"hex": "#DC3545", "rgb": (220, 53, 69)},
-            "neutral_gray": {"hex": "#6C757D", "rgb": (108, 117, 125)},
-            "light_gray": {"hex": "#F8F9FA", "rgb": (248, 249, 250)},
-        },
-    }
+# 单个可选的 # 加 6 位或 3 位十六进制数字；int(..., 16) 本身还会接受 "+"、"0x" 前缀和下划线
+_HEX_COLOR_RE = re.compile(r"#?([0-9A-Fa-f]{6}|[0-9A-Fa-f]{3})")
+
+
+def _hex_to_rgb(color: str) -> Optional[Tuple[int, int, int]]:
+    """将 #RRGGBB 或 #RGB 十六进制颜色解析为RGB元组，无法解析时返回 None。"""
+    match = _HEX_COLOR_RE.fullmatch(color.strip())
+    if match is None:
+        return None
+    digits = match.group(1)
+    if len(digits) == 3:
+        digits = "".join(ch * 2 for ch in digits)
+    value = int(digits, 16)
+    return (value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF
+
+
+class _FrozenList(tuple):
+    """由 _freeze 从列表转换而来的元组，_thaw 时还原为列表（原本的元组保持不变）。"""
+
+    __slots__ = ()
+
+
+def _freeze(value: Any) -> Any:
+    """递归地将字典转为只读 MappingProxyType、列表转为元组。"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return _FrozenList(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """_freeze 的逆操作：返回由普通 dict/list 组成的新副本，可自由修改和序列化。"""
+    if isinstance(value, MappingProxyType):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, _FrozenList):
+        return [_thaw(item) for item in value]
+    return value
 
-    # 字体定义
-    FONTS = {
-        "primary": "Segoe UI",
-        "fallback": ["system-ui", "-apple-system", "sans-serif"],
-        "sizes": {"h1": 32, "h2": 24, "h3": 18, "body": 11, "caption": 9},
-        "weights": {"regular": 400, "semibold": 600, "bold": 700},
-    }
 
-    # 公司信息
-    COMPANY = {
-        "name": "Acme Corporation",
-        "tagline": "卓越创新",
-        "copyright": "© 2025 Acme Corporation. 保留所有权利。",
-        "website": "www.acmecorp.example",
-        "logo_path": "assets/acme_logo.png",
+# large_number 格式的量级缩放系数与模板，按 0/K/M 分桶索引
+_LARGE_NUMBER_SCALES = np.array([1.0, 1_000.0, 1_000_000.0])
+_LARGE_NUMBER_TEMPLATES = ("{:.0f}", "{:.1f}K", "{:.1f}M")
+
+
+def _format_large_number(value: float) -> str:
+    """以 M/K 后缀格式化大数。"""
+    if value >= 1_000_000:
+        return f"{value / 1_000_000:.1f}M"
+    if value >= 1_000:
+        return f"{value / 1_000:.1f}K"
+    return f"{value:.0f}"
+
+
+def _format_general_number(value: float) -> str:
+    """通用数字格式：千位以上加分隔符，否则保留两位小数。"""
+    return f"{value:,.0f}" if value >= 1000 else f"{value:.2f}"
+
+
+class BrandFormatter:
+    """将企业品牌指南应用于文档。"""
+
+    # 品牌颜色定义（只读，需要修改时请先转换为 dict/list）
+    COLORS = _freeze(
+        {
+            "primary": {
+                "acme_blue": {"hex": "#0066CC", "rgb": (0, 102, 204)},
+                "acme_navy": {"hex": "#003366", "rgb": (0, 51, 102)},
+                "white": {"hex": "#FFFFFF", "rgb": (255, 255, 255)},
+            },
+            "secondary": {
+                "success_green": {"hex": "#28A745", "rgb": (40, 167, 69)},
+                "warning_amber": {"hex": "#FFC107", "rgb": (255, 193, 7)},
+                "error_red": {"hex": "#DC3545", "rgb": (220, 53, 69)},
+                "neutral_gray": {"hex": "#6C757D", "rgb": (108, 117, 125)},
+                "light_gray": {"hex": "#F8F9FA", "rgb": (248, 249, 250)},
+            },
+        }
+    )
+
+    # 字体定义（只读）
+    FONTS = _freeze(
+        {
+            "primary": "Segoe UI",
+            "fallback": ["system-ui", "-apple-system", "sans-serif"],
+            "sizes": {"h1": 32, "h2": 24, "h3": 18, "body": 11, "caption": 9},
+            "weights": {"regular": 400, "semibold": 600, "bold": 700},
+        }
+    )
+
+    # 公司信息（只读）
+    COMPANY = _freeze(
+        {
+            "name": "Acme Corporation",
+            "tagline": "卓越创新",
+            "copyright": "© 2025 Acme Corporation. 保留所有权利。",
+            "website": "www.acmecorp.example",
+            "logo_path": "assets/acme_logo.png",
+        }
+    )
+
+    # 数字格式化类型 -> 格式化函数，未知类型按通用格式处理
+    _NUMBER_FORMATTERS = {
+        "currency": lambda value: f"${value:,.2f}",
+        "percentage": lambda value: f"{value:.1f}%",
+        "large_number": _format_large_number,
+        "general": _format_general_number,
     }
 
     def __init__(self):
         """使用标准设置初始化品牌格式化器。"""
-        self.colors = self.COLORS
-        self.fonts = self.FONTS
-        self.company = self.COMPANY
+        # 只读类常量的普通 dict/list 副本，供调用方读取、修改或序列化
+        self.colors = _thaw(self.COLORS)
+        self.fonts = _thaw(self.FONTS)
+        self.company = _thaw(self.COMPANY)
+
+        # 批准颜色的大写十六进制集合，以及十六进制到RGB的映射
+        brand_colors = [color for category in self.colors.values() for color in category.values()]
+        self._approved_hex = frozenset(color["hex"].upper() for color in brand_colors)
+        self._approved_hex_to_rgb = {color["hex"].upper(): color["rgb"] for color in brand_colors}
+
+        # 最接近颜色搜索使用的 (N, 3) 品牌RGB矩阵及对应的十六进制代码
+        self._brand_hex = [color["hex"] for color in brand_colors]
+        self._brand_rgb = np.array([color["rgb"] for color in brand_colors], dtype=np.int32)
+
+        # 各文档类型的品牌样式模板只依赖类常量，构建一次后冻结为只读结构；公开方法返回其副本
+        self._excel_template = _freeze(self._build_excel_template())
+        self._powerpoint_template = _freeze(self._build_powerpoint_template())
+        self._pdf_template = _freeze(self._build_pdf_template())
+        self._watermarks = _freeze(self._build_watermarks())
+        self._chart_palette = self._build_chart_palette()
 
     def format_excel(self, workbook_config: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -58,46 +153,7 @@ class BrandFormatter:
         Returns:
             品牌化的工作簿配置
         """
-        branded_config = workbook_config.copy()
-
-        # 应用表头格式化
-        branded_config["header_style"] = {
-            "font": {
-                "name": self.fonts["primary"],
-                "size": self.fonts["sizes"]["body"],
-                "bold": True,
-                "color": self.colors["primary"]["white"]["hex"],
-            },
-            "fill": {"type": "solid", "color": self.colors["primary"]["acme_blue"]["hex"]},
-            "alignment": {"horizontal": "center", "vertical": "center"},
-            "border": {"style": "thin", "color": self.colors["secondary"]["neutral_gray"]["hex"]},
-        }
-
-        # 应用数据单元格格式化
-        branded_config["cell_style"] = {
-            "font": {
-                "name": self.fonts["primary"],
-                "size": self.fonts["sizes"]["body"],
-                "color": self.colors["primary"]["acme_navy"]["hex"],
-            },
-            "alignment": {"horizontal": "left", "vertical": "center"},
-        }
-
-        # 应用交替行颜色
-        branded_config["alternating_rows"] = {
-            "enabled": True,
-            "color": self.colors["secondary"]["light_gray"]["hex"],
-        }
-
-        # 图表配色方案
-        branded_config["chart_colors"] = [
-            self.colors["primary"]["acme_blue"]["hex"],
-            self.colors["secondary"]["success_green"]["hex"],
-            self.colors["secondary"]["warning_amber"]["hex"],
-            self.colors["secondary"]["neutral_gray"]["hex"],
-        ]
-
-        return branded_config
+        return {**workbook_config, **_thaw(self._excel_template)}
 
     def format_powerpoint(self, presentation_config: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -109,63 +165,7 @@ class BrandFormatter:
         Returns:
             品牌化的演示文稿配置
         """
-        branded_config = presentation_config.copy()
-
-        # 幻灯片母版设置
-        branded_config["master"] = {
-            "background_color": self.colors["primary"]["white"]["hex"],
-            "title_area": {
-                "font": self.fonts["primary"],
-                "size": self.fonts["sizes"]["h1"],
-                "color": self.colors["primary"]["acme_blue"]["hex"],
-                "bold": True,
-                "position": {"x": 0.5, "y": 0.15, "width": 9, "height": 1},
-            },
-            "content_area": {
-                "font": self.fonts["primary"],
-                "size": self.fonts["sizes"]["body"],
-                "color": self.colors["primary"]["acme_navy"]["hex"],
-                "position": {"x": 0.5, "y": 2, "width": 9, "height": 5},
-            },
-            "footer": {
-                "show_slide_number": True,
-                "show_date": True,
-                "company_name": self.company["name"],
-            },
-        }
-
-        # 标题幻灯片模板
-        branded_config["title_slide"] = {
-            "background": self.colors["primary"]["acme_blue"]["hex"],
-            "title_color": self.colors["primary"]["white"]["hex"],
-            "subtitle_color": self.colors["primary"]["white"]["hex"],
-            "include_logo": True,
-            "logo_position": {"x": 0.5, "y": 0.5, "width": 2},
-        }
-
-        # 内容幻灯片模板
-        branded_config["content_slide"] = {
-            "title_bar": {
-                "background": self.colors["primary"]["acme_blue"]["hex"],
-                "text_color": self.colors["primary"]["white"]["hex"],
-                "height": 1,
-            },
-            "bullet_style": {"level1": "•", "level2": "○", "level3": "▪", "indent": 0.25},
-        }
-
-        # 图表默认设置
-        branded_config["charts"] = {
-            "color_scheme": [
-                self.colors["primary"]["acme_blue"]["hex"],
-                self.colors["secondary"]["success_green"]["hex"],
-                self.colors["secondary"]["warning_amber"]["hex"],
-                self.colors["secondary"]["neutral_gray"]["hex"],
-            ],
-            "gridlines": {"color": self.colors["secondary"]["neutral_gray"]["hex"], "width": 0.5},
-            "font": {"name": self.fonts["primary"], "size": self.fonts["sizes"]["caption"]},
-        }
-
-        return branded_config
+        return {**presentation_config, **_thaw(self._powerpoint_template)}
 
     def format_pdf(self, document_config: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -177,99 +177,239 @@ class BrandFormatter:
         Returns:
             品牌化的文档配置
         """
-        branded_config = document_config.copy()
-
-        # 页面布局
-        branded_config["page"] = {
-            "margins": {"top": 1, "bottom": 1, "left": 1, "right": 1},
-            "size": "letter",
-            "orientation": "portrait",
+        return {
+            **document_config,
+            **_thaw(self._pdf_template),
+            "header": self._build_pdf_header(document_config.get("title", "Document")),
         }
 
-        # 页眉配置
-        branded_config["header"] = {
-            "height": 0.75,
-            "content": {
-                "left": {"type": "logo", "width": 1.5},
-                "center": {
-                    "type": "text",
-                    "content": document_config.get("title", "Document"),
-                    "font": self.fonts["primary"],
+    def _build_excel_template(self) -> Dict[str, Any]:
+        """构建Excel品牌样式模板，仅依赖类常量。"""
+        return {
+            # 应用表头格式化
+            "header_style": {
+                "font": {
+                    "name": self.fonts["primary"],
+                    "size": self.fonts["sizes"]["body"],
+                    "bold": True,
+                    "color": self.colors["primary"]["white"]["hex"],
+                },
+                "fill": {"type": "solid", "color": self.colors["primary"]["acme_blue"]["hex"]},
+                "alignment": {"horizontal": "center", "vertical": "center"},
+                "border": {
+                    "style": "thin",
+                    "color": self.colors["secondary"]["neutral_gray"]["hex"],
+                },
+            },
+            # 应用数据单元格格式化
+            "cell_style": {
+                "font": {
+                    "name": self.fonts["primary"],
                     "size": self.fonts["sizes"]["body"],
                     "color": self.colors["primary"]["acme_navy"]["hex"],
                 },
-                "right": {"type": "page_number", "format": "Page {page} of {total}"},
+                "alignment": {"horizontal": "left", "vertical": "center"},
+            },
+            # 应用交替行颜色
+            "alternating_rows": {
+                "enabled": True,
+                "color": self.colors["secondary"]["light_gray"]["hex"],
             },
+            # 图表配色方案
+            "chart_colors": [
+                self.colors["primary"]["acme_blue"]["hex"],
+                self.colors["secondary"]["success_green"]["hex"],
+                self.colors["secondary"]["warning_amber"]["hex"],
+                self.colors["secondary"]["neutral_gray"]["hex"],
+            ],
         }
 
-        # 页脚配置
-        branded_config["footer"] = {
-            "height": 0.5,
-            "content": {
-                "left": {
-                    "type": "text",
-                    "content": self.company["copyright"],
+    def _build_powerpoint_template(self) -> Dict[str, Any]:
+        """构建PowerPoint品牌样式模板，仅依赖类常量。"""
+        return {
+            # 幻灯片母版设置
+            "master": {
+                "background_color": self.colors["primary"]["white"]["hex"],
+                "title_area": {
                     "font": self.fonts["primary"],
-                    "size": self.fonts["sizes"]["caption"],
+                    "size": self.fonts["sizes"]["h1"],
+                    "color": self.colors["primary"]["acme_blue"]["hex"],
+                    "bold": True,
+                    "position": {"x": 0.5, "y": 0.15, "width": 9, "height": 1},
+                },
+                "content_area": {
+                    "font": self.fonts["primary"],
+                    "size": self.fonts["sizes"]["body"],
+                    "color": self.colors["primary"]["acme_navy"]["hex"],
+                    "position": {"x": 0.5, "y": 2, "width": 9, "height": 5},
+                },
+                "footer": {
+                    "show_slide_number": True,
+                    "show_date": True,
+                    "company_name": self.company["name"],
+                },
+            },
+            # 标题幻灯片模板
+            "title_slide": {
+                "background": self.colors["primary"]["acme_blue"]["hex"],
+                "title_color": self.colors["primary"]["white"]["hex"],
+                "subtitle_color": self.colors["primary"]["white"]["hex"],
+                "include_logo": True,
+                "logo_position": {"x": 0.5, "y": 0.5, "width": 2},
+            },
+            # 内容幻灯片模板
+            "content_slide": {
+                "title_bar": {
+                    "background": self.colors["primary"]["acme_blue"]["hex"],
+                    "text_color": self.colors["primary"]["white"]["hex"],
+                    "height": 1,
+                },
+                "bullet_style": {"level1": "•", "level2": "○", "level3": "▪", "indent": 0.25},
+            },
+            # 图表默认设置
+            "charts": {
+                "color_scheme": [
+                    self.colors["primary"]["acme_blue"]["hex"],
+                    self.colors["secondary"]["success_green"]["hex"],
+                    self.colors["secondary"]["warning_amber"]["hex"],
+                    self.colors["secondary"]["neutral_gray"]["hex"],
+                ],
+                "gridlines": {
                     "color": self.colors["secondary"]["neutral_gray"]["hex"],
+                    "width": 0.5,
                 },
-                "center": {"type": "date", "format": "%Y年%m月%d日"},
-                "right": {"type": "text", "content": "机密"},
+                "font": {"name": self.fonts["primary"], "size": self.fonts["sizes"]["caption"]},
             },
         }
 
-        # 文本样式
-        branded_config["styles"] = {
-            "heading1": {
-                "font": self.fonts["primary"],
-                "size": self.fonts["sizes"]["h1"],
-                "color": self.colors["primary"]["acme_blue"]["hex"],
-                "bold": True,
-                "spacing_after": 12,
+    def _build_pdf_template(self) -> Dict[str, Any]:
+        """构建PDF品牌样式模板，仅依赖类常量。"""
+        return {
+            # 页面布局
+            "page": {
+                "margins": {"top": 1, "bottom": 1, "left": 1, "right": 1},
+                "size": "letter",
+                "orientation": "portrait",
             },
-            "heading2": {
-                "font": self.fonts["primary"],
-                "size": self.fonts["sizes"]["h2"],
-                "color": self.colors["primary"]["acme_navy"]["hex"],
-                "bold": True,
-                "spacing_after": 10,
+            # 页脚配置
+            "footer": {
+                "height": 0.5,
+                "content": {
+                    "left": {
+                        "type": "text",
+                        "content": self.company["copyright"],
+                        "font": self.fonts["primary"],
+                        "size": self.fonts["sizes"]["caption"],
+                        "color": self.colors["secondary"]["neutral_gray"]["hex"],
+                    },
+                    "center": {"type": "date", "format": "%Y年%m月%d日"},
+                    "right": {"type": "text", "content": "机密"},
+                },
             },
-            "heading3": {
-                "font": self.fonts["primary"],
-                "size": self.fonts["sizes"]["h3"],
-                "color": self.colors["primary"]["acme_navy"]["hex"],
-                "bold": False,
-                "spacing_after": 8,
+            # 文本样式
+            "styles": {
+                "heading1": {
+                    "font": self.fonts["primary"],
+                    "size": self.fonts["sizes"]["h1"],
+                    "color": self.colors["primary"]["acme_blue"]["hex"],
+                    "bold": True,
+                    "spacing_after": 12,
+                },
+                "heading2": {
+                    "font": self.fonts["primary"],
+                    "size": self.fonts["sizes"]["h2"],
+                    "color": self.colors["primary"]["acme_navy"]["hex"],
+                    "bold": True,
+                    "spacing_after": 10,
+                },
+                "heading3": {
+                    "font": self.fonts["primary"],
+                    "size": self.fonts["sizes"]["h3"],
+                    "color": self.colors["primary"]["acme_navy"]["hex"],
+                    "bold": False,
+                    "spacing_after": 8,
+                },
+                "body": {
+                    "font": self.fonts["primary"],
+                    "size": self.fonts["sizes"]["body"],
+                    "color": self.colors["primary"]["acme_navy"]["hex"],
+                    "line_spacing": 1.15,
+                    "paragraph_spacing": 12,
+                },
+                "caption": {
+                    "font": self.fonts["primary"],
+                    "size": self.fonts["sizes"]["caption"],
+                    "color": self.colors["secondary"]["neutral_gray"]["hex"],
+                    "italic": True,
+                },
             },
-            "body": {
-                "font": self.fonts["primary"],
-                "size": self.fonts["sizes"]["body"],
-                "color": self.colors["primary"]["acme_navy"]["hex"],
-                "line_spacing": 1.15,
-                "paragraph_spacing": 12,
+            # 表格格式化
+            "table_style": {
+                "header": {
+                    "background": self.colors["primary"]["acme_blue"]["hex"],
+                    "text_color": self.colors["primary"]["white"]["hex"],
+                    "bold": True,
+                },
+                "rows": {
+                    "alternating_color": self.colors["secondary"]["light_gray"]["hex"],
+                    "border_color": self.colors["secondary"]["neutral_gray"]["hex"],
+                },
             },
-            "caption": {
-                "font": self.fonts["primary"],
-                "size": self.fonts["sizes"]["caption"],
-                "color": self.colors["secondary"]["neutral_gray"]["hex"],
-                "italic": True,
+        }
+
+    def _build_pdf_header(self, title: str) -> Dict[str, Any]:
+        """构建带文档标题的PDF页眉配置。"""
+        return {
+            "height": 0.75,
+            "content": {
+                "left": {"type": "logo", "width": 1.5},
+                "center": {
+                    "type": "text",
+                    "content": title,
+                    "font": self.fonts["primary"],
+                    "size": self.fonts["sizes"]["body"],
+                    "color": self.colors["primary"]["acme_navy"]["hex"],
+                },
+                "right": {"type": "page_number", "format": "Page {page} of {total}"},
             },
         }
 
-        # 表格格式化
-        branded_config["table_style"] = {
-            "header": {
-                "background": self.colors["primary"]["acme_blue"]["hex"],
-                "text_color": self.colors["primary"]["white"]["hex"],
-                "bold": True,
+    def _build_watermarks(self) -> Dict[str, Dict[str, Any]]:
+        """构建各文档类型的水印配置。"""
+        return {
+            "draft": {
+                "text": "DRAFT",
+                "color": self.colors["secondary"]["neutral_gray"]["hex"],
+                "opacity": 0.1,
+                "angle": 45,
+                "font_size": 72,
             },
-            "rows": {
-                "alternating_color": self.colors["secondary"]["light_gray"]["hex"],
-                "border_color": self.colors["secondary"]["neutral_gray"]["hex"],
+            "confidential": {
+                "text": "CONFIDENTIAL",
+                "color": self.colors["secondary"]["error_red"]["hex"],
+                "opacity": 0.1,
+                "angle": 45,
+                "font_size": 60,
+            },
+            "sample": {
+                "text": "SAMPLE",
+                "color": self.colors["secondary"]["warning_amber"]["hex"],
+                "opacity": 0.15,
+                "angle": 45,
+                "font_size": 72,
             },
         }
 
-        return branded_config
+    def _build_chart_palette(self) -> List[str]:
+        """构建图表配色列表。"""
+        return [
+            self.colors["primary"]["acme_blue"]["hex"],
+            self.colors["secondary"]["success_green"]["hex"],
+            self.colors["secondary"]["warning_amber"]["hex"],
+            self.colors["secondary"]["neutral_gray"]["hex"],
+            self.colors["primary"]["acme_navy"]["hex"],
+            self.colors["secondary"]["error_red"]["hex"],
+        ]
 
     def validate_colors(self, colors_used: List[str]) -> Dict[str, Any]:
         """
@@ -279,35 +419,55 @@ class BrandFormatter:
             colors_used: 文档中使用的颜色代码列表
 
         Returns:
-            验证结果，如有需要则包含修正建议
+            验证结果，如有需要则包含修正建议（同一颜色忽略大小写只报告一次）
         """
         results = {"valid": True, "corrections": [], "warnings": []}
 
-        approved_colors = []
-        for category in self.colors.values():
-            for color in category.values():
-                approved_colors.append(color["hex"].upper())
-
+        # 文档中同一颜色往往重复出现，按大写去重并保留首次出现的写法
+        unique_colors = {}
         for color in colors_used:
-            color_upper = color.upper()
-            if color_upper not in approved_colors:
-                results["valid"] = False
-                # 查找最接近的品牌颜色
-                closest = self._find_closest_brand_color(color)
-                results["corrections"].append(
-                    {
-                        "original": color,
-                        "suggested": closest,
-                        "message": f"非品牌颜色 {color} 应替换为 {closest}",
-                    }
-                )
+            unique_colors.setdefault(color.upper(), color)
+        invalid = [
+            color for upper, color in unique_colors.items() if upper not in self._approved_hex
+        ]
+        if not invalid:
+            return results
+
+        results["valid"] = False
+        # 批量查找最接近的品牌颜色
+        for color, closest in zip(invalid, self._find_closest_brand_colors(invalid)):
+            results["corrections"].append(
+                {
+                    "original": color,
+                    "suggested": closest,
+                    "message": f"非品牌颜色 {color} 应替换为 {closest}",
+                }
+            )
 
         return results
 
     def _find_closest_brand_color(self, color: str) -> str:
         """查找与给定颜色最接近的品牌颜色。"""
-        # 简化实现 - 实际中应计算颜色距离
-        return self.colors["primary"]["acme_blue"]["hex"]
+        return self._find_closest_brand_colors([color])[0]
+
+    def _find_closest_brand_colors(self, colors: List[str]) -> List[str]:
+        """
+        批量查找最接近的品牌颜色（RGB空间欧氏距离）。
+
+        无法解析的颜色回退为主品牌蓝。
+        """
+        default = self.colors["primary"]["acme_blue"]["hex"]
+        parsed = [_hex_to_rgb(color) for color in colors]
+        valid = [rgb for rgb in parsed if rgb is not None]
+        if not valid:
+            return [default] * len(colors)
+
+        # (M, 1, 3) - (1, N, 3) 广播后沿通道求平方距离
+        targets = np.array(valid, dtype=np.int32)
+        distances = ((targets[:, None, :] - self._brand_rgb[None, :, :]) ** 2).sum(axis=2)
+        closest = iter(distances.argmin(axis=1).tolist())
+
+        return [default if rgb is None else self._brand_hex[next(closest)] for rgb in parsed]
 
     def apply_watermark(self, document_type: str) -> Dict[str, Any]:
         """
@@ -319,31 +479,7 @@ class BrandFormatter:
         Returns:
             水印配置
         """
-        watermarks = {
-            "draft": {
-                "text": "DRAFT",
-                "color": self.colors["secondary"]["neutral_gray"]["hex"],
-                "opacity": 0.1,
-                "angle": 45,
-                "font_size": 72,
-            },
-            "confidential": {
-                "text": "CONFIDENTIAL",
-                "color": self.colors["secondary"]["error_red"]["hex"],
-                "opacity": 0.1,
-                "angle": 45,
-                "font_size": 60,
-            },
-            "sample": {
-                "text": "SAMPLE",
-                "color": self.colors["secondary"]["warning_amber"]["hex"],
-                "opacity": 0.15,
-                "angle": 45,
-                "font_size": 72,
-            },
-        }
-
-        return watermarks.get(document_type, watermarks["draft"])
+        return _thaw(self._watermarks.get(document_type, self._watermarks["draft"]))
 
     def get_chart_palette(self, num_series: int = 4) -> List[str]:
         """
@@ -355,16 +491,7 @@ class BrandFormatter:
         Returns:
             十六进制颜色代码列表
         """
-        palette = [
-            self.colors["primary"]["acme_blue"]["hex"],
-            self.colors["secondary"]["success_green"]["hex"],
-            self.colors["secondary"]["warning_amber"]["hex"],
-            self.colors["secondary"]["neutral_gray"]["hex"],
-            self.colors["primary"]["acme_navy"]["hex"],
-            self.colors["secondary"]["error_red"]["hex"],
-        ]
-
-        return palette[:num_series]
+        return self._chart_palette[:num_series]
 
     def format_number(self, value: float, format_type: str = "general") -> str:
         """
@@ -377,19 +504,47 @@ class BrandFormatter:
         Returns:
             格式化后的字符串
         """
-        if format_type == "currency":
-            return f"${value:,.2f}"
-        elif format_type == "percentage":
-            return f"{value:.1f}%"
-        elif format_type == "large_number":
-            if value >= 1_000_000:
-                return f"{value / 1_000_000:.1f}M"
-            elif value >= 1_000:
-                return f"{value / 1_000:.1f}K"
-            else:
-                return f"{value:.0f}"
-        else:
-            return f"{value:,.0f}" if value >= 1000 else f"{value:.2f}"
+        formatter = self._NUMBER_FORMATTERS.get(format_type, _format_general_number)
+        return formatter(value)
+
+    def format_numbers(self, values: Sequence[float], format_type: str = "general") -> List[str]:
+        """
+        批量格式化数字，结果与逐个调用 format_number 一致。
+
+        Args:
+            values: 数值序列或数组
+            format_type: 格式化类型（货币、百分比、通用）
+
+        Returns:
+            格式化后的字符串列表
+        """
+        values = np.asarray(values, dtype=np.float64)
+
+        if format_type == "large_number":
+            # 按量级分桶后整体缩放，再按桶选择模板
+            bucket = (values >= 1_000).astype(np.intp) + (values >= 1_000_000)
+            scaled = values / _LARGE_NUMBER_SCALES[bucket]
+            return [
+                _LARGE_NUMBER_TEMPLATES[b].format(v)
+                for b, v in zip(bucket.tolist(), scaled.tolist())
+            ]
+
+        if format_type in ("currency", "percentage"):
+            formatter = self._NUMBER_FORMATTERS[format_type]
+            return [formatter(v) for v in values.tolist()]
+
+        is_large = (values >= 1000).tolist()
+        return [f"{v:,.0f}" if large else f"{v:.2f}" for v, large in zip(values.tolist(), is_large)]
+
+
+@functools.lru_cache(maxsize=1)
+def _get_formatter() -> BrandFormatter:
+    """
+    返回共享的品牌格式化器实例。
+
+    其状态只依赖类常量，各公开方法返回的配置都是独立副本，调用方修改结果不会影响其他调用。
+    """
+    return BrandFormatter()
 
 
 def apply_brand_to_document(document_type: str, config: Dict[str, Any]) -> Dict[str, Any]:
@@ -403,7 +558,7 @@ def apply_brand_to_document(document_type: str, config: Dict[str, Any]) -> Dict[
     Returns:
         品牌化配置
     """
-    formatter = BrandFormatter()
+    formatter = _get_formatter()
 
     if document_type.lower() == "excel":
         return formatter.format_excel(config)
@@ -0,0 +1,67 @@
+"""
+品牌验证脚本的单元测试。
+
+测试融合扫描与品牌名称扫描在同一位置重叠时的结果。
+"""
+
+import unittest
+
+from validate_brand import BrandGuidelines, BrandValidator
+
+
+def _make_validator(brand_name: str) -> BrandValidator:
+    return BrandValidator(
+        BrandGuidelines(
+            brand_name=brand_name,
+            primary_colors=["#FF0000"],
+            secondary_colors=[],
+            fonts=["Arial"],
+            tone_keywords=[],
+            prohibited_words=[],
+        )
+    )
+
+
+class TestBrandScan(unittest.TestCase):
+    """测试 BrandValidator._scan 的分类匹配"""
+
+    def test_brand_name_overlapping_font_declarations(self):
+        """测试品牌名称与字体声明在同一位置开始时仍被记录"""
+        validator = _make_validator("Font")
+        content = "font-family: Arial; font: 12px Arial, sans-serif; Font"
+
+        found = validator._scan(content, content.lower())
+
+        self.assertEqual(found["brand"], ["font", "font", "Font"])
+        self.assertEqual(found["fontfam"], ["Arial"])
+        self.assertEqual(found["font"], ["Arial"])
+
+    def test_brand_name_overlapping_rgb_color(self):
+        """测试品牌名称与 RGB 颜色在同一位置开始时两者都被记录"""
+        validator = _make_validator("rgb")
+        content = "color: RGB(255,0,0)"
+
+        found = validator._scan(content, content.lower())
+
+        self.assertEqual(found["brand"], ["RGB"])
+        self.assertEqual(found["rgb"], ["RGB(255,0,0)"])
+
+    def test_scan_matches_separate_validators(self):
+        """测试 validate 的违规项与分别调用各检查的结果一致"""
+        validator = _make_validator("Font")
+        content = "font-family: Comic Sans; color: #00FF00; font is great"
+
+        result = validator.validate(content)
+
+        expected = []
+        for check in (
+            validator.validate_colors,
+            validator.validate_fonts,
+            validator.validate_brand_name,
+        ):
+            expected.extend(check(content)[0])
+        self.assertEqual(sorted(result.violations), sorted(expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,13 +4,64 @@
 根据品牌指南验证内容，包括颜色、字体、语调和消息。
 """
 
+import functools
 import re
 import json
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass, asdict
-
-
-@dataclass
+from typing import Dict, Iterable, List, Optional, Pattern, Set, Tuple
+from dataclasses import dataclass, replace
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，缺失时回退到标准库 json
+    orjson = None
+
+# 颜色与字体匹配模式
+_HEX_PATTERN = r"#[0-9A-Fa-f]{6}|#[0-9A-Fa-f]{3}"
+_RGB_PATTERN = r"rgb\s*\(\s*\d{1,3}\s*,\s*\d{1,3}\s*,\s*\d{1,3}\s*\)"
+_FONT_FAMILY_PATTERN = r'font-family\s*:\s*["\']?(?P<fontfam_name>[^;"\']+)["\']?'
+_FONT_SHORTHAND_PATTERN = r"font:\s*[^;]*\s+(?P<font_name>[A-Za-z][A-Za-z\s]+)(?:,|;|\s+\d)"
+
+_HEX_RE = re.compile(_HEX_PATTERN)
+_RGB_RE = re.compile(_RGB_PATTERN, re.IGNORECASE)
+_FONT_RES = (
+    re.compile(_FONT_FAMILY_PATTERN, re.IGNORECASE),
+    re.compile(_FONT_SHORTHAND_PATTERN, re.IGNORECASE),
+)
+
+# 融合扫描的具名分支；各分支均为零宽前瞻，不同类别的匹配可以重叠。
+# 各分支首字符不同（#、r、font-family、font:），同一位置至多一个分支匹配。
+# 品牌名称可能与任一分支在同一位置开始（如品牌 "Font"），因此不并入此正则，单独扫描
+_SCAN_BRANCHES = (
+    f"(?=(?P<hex>{_HEX_PATTERN}))",
+    f"(?=(?P<rgb>{_RGB_PATTERN}))",
+    f"(?=(?P<fontfam>{_FONT_FAMILY_PATTERN}))",
+    f"(?=(?P<font>{_FONT_SHORTHAND_PATTERN}))",
+)
+# 分支名称 -> 需要提取的分组
+_SCAN_VALUE_GROUPS = {
+    "hex": "hex",
+    "rgb": "rgb",
+    "fontfam": "fontfam_name",
+    "font": "font_name",
+}
+# 首字符预筛选让正则引擎直接跳到可能匹配的位置
+_SCAN_RE = re.compile(f"(?=[#rf])(?:{'|'.join(_SCAN_BRANCHES)})", re.IGNORECASE)
+
+
+def _compile_alternation(words: Iterable[str]) -> Optional[Pattern[str]]:
+    """将词列表编译为单个交替正则，词列表为空时返回 None"""
+    words = list(words)
+    if not words:
+        return None
+    return re.compile("|".join(re.escape(word) for word in words))
+
+
+def _can_overlap(other: str, word: str) -> bool:
+    """other 的某次出现是否可能遮住 word：包含 word，或其后缀与 word 的前缀重叠"""
+    return word in other or any(other.endswith(word[:k]) for k in range(1, len(word)))
+
+
+@dataclass(slots=True)
 class BrandGuidelines:
     """品牌指南配置"""
 
@@ -23,8 +74,23 @@ class BrandGuidelines:
     tagline: Optional[str] = None
     logo_usage_rules: Optional[Dict] = None
 
-
-@dataclass
+    def to_dict(self) -> Dict:
+        """转换为普通字典（列表字段为副本）"""
+        return {
+            "brand_name": self.brand_name,
+            "primary_colors": list(self.primary_colors),
+            "secondary_colors": list(self.secondary_colors),
+            "fonts": list(self.fonts),
+            "tone_keywords": list(self.tone_keywords),
+            "prohibited_words": list(self.prohibited_words),
+            "tagline": self.tagline,
+            "logo_usage_rules": (
+                dict(self.logo_usage_rules) if self.logo_usage_rules is not None else None
+            ),
+        }
+
+
+@dataclass(slots=True)
 class ValidationResult:
     """品牌验证结果"""
 
@@ -34,33 +100,81 @@ class ValidationResult:
     warnings: List[str]
     suggestions: List[str]
 
+    def to_dict(self) -> Dict:
+        """转换为普通字典（列表字段为副本）"""
+        return {
+            "passed": self.passed,
+            "score": self.score,
+            "violations": list(self.violations),
+            "warnings": list(self.warnings),
+            "suggestions": list(self.suggestions),
+        }
+
 
 class BrandValidator:
     """根据品牌指南验证内容"""
 
     def __init__(self, guidelines: BrandGuidelines):
         self.guidelines = guidelines
+        # 按内容缓存验证结果；缓存挂在实例上，随验证器一起释放
+        self._validate_cached = functools.lru_cache(maxsize=128)(self._validate_uncached)
+        self._approved_colors_upper = frozenset(
+            color.upper() for color in guidelines.primary_colors + guidelines.secondary_colors
+        )
+        self._approved_fonts_lower = tuple(font.lower() for font in guidelines.fonts)
+        self._brand_name_re = re.compile(re.escape(guidelines.brand_name), re.IGNORECASE)
+        self._brand_name_lower = guidelines.brand_name.lower()
+
+        # 禁用词合并为一个交替正则（长词优先）单次扫描；交替匹配互不重叠，
+        # 可能与其他禁用词重叠出现的词在未命中时需额外用 in 检查
+        prohibited = sorted({word.lower() for word in guidelines.prohibited_words}, key=len)
+        self._prohibited_re = _compile_alternation(reversed(prohibited))
+        self._overlapping_prohibited = frozenset(
+            word
+            for word in prohibited
+            if any(_can_overlap(other, word) for other in prohibited if other != word)
+        )
+        self._tone_re = _compile_alternation(
+            keyword.lower() for keyword in guidelines.tone_keywords
+        )
+
+    def _scan(self, content: str, content_lower: str) -> Dict[str, List[str]]:
+        """
+        单次遍历内容，按类别收集颜色和字体的匹配；品牌名称单独扫描
+        Returns: 类别 -> 匹配文本列表
+        """
+        found = {kind: [] for kind in _SCAN_VALUE_GROUPS}
+        # 同一类别的匹配互不重叠：跳过落在该类别上一个匹配内部的位置
+        next_start = dict.fromkeys(_SCAN_VALUE_GROUPS, 0)
+        for match in _SCAN_RE.finditer(content):
+            kind = match.lastgroup
+            if match.start() < next_start[kind]:
+                continue
+            next_start[kind] = match.end(kind)
+            found[kind].append(match.group(_SCAN_VALUE_GROUPS[kind]))
+
+        # 多数内容不含品牌名称，此时跳过品牌名称扫描
+        if self._brand_name_lower in content_lower:
+            found["brand"] = self._brand_name_re.findall(content)
+        else:
+            found["brand"] = []
+        return found
 
     def validate_colors(self, content: str) -> Tuple[List[str], List[str]]:
         """
         验证内容中的颜色使用（十六进制代码、RGB、颜色名称）
         Returns: (violations, warnings)
         """
+        # 查找十六进制颜色和RGB颜色
+        return self._check_colors(_HEX_RE.findall(content) + _RGB_RE.findall(content))
+
+    def _check_colors(self, found_colors: List[str]) -> Tuple[List[str], List[str]]:
+        """检查已找到的颜色是否均为批准颜色"""
         violations = []
         warnings = []
 
-        # 查找十六进制颜色
-        hex_pattern = r"#[0-9A-Fa-f]{6}|#[0-9A-Fa-f]{3}"
-        found_colors = re.findall(hex_pattern, content)
-
-        # 查找RGB颜色
-        rgb_pattern = r"rgb\s*\(\s*\d{1,3}\s*,\s*\d{1,3}\s*,\s*\d{1,3}\s*\)"
-        found_colors.extend(re.findall(rgb_pattern, content, re.IGNORECASE))
-
-        approved_colors = self.guidelines.primary_colors + self.guidelines.secondary_colors
-
         for color in found_colors:
-            if color.upper() not in [c.upper() for c in approved_colors]:
+            if color.upper() not in self._approved_colors_upper:
                 violations.append(f"使用了未批准的颜色: {color}")
 
         return violations, warnings
@@ -70,48 +184,53 @@ class BrandValidator:
         验证内容中的字体使用
         Returns: (violations, warnings)
         """
-        violations = []
-        warnings = []
-
         # 常见字体规范模式
-        font_patterns = [
-            r'font-family\s*:\s*["\']?([^;"\']+)["\']?',
-            r"font:\s*[^;]*\s+([A-Za-z][A-Za-z\s]+)(?:,|;|\s+\d)",
-        ]
-
         found_fonts = []
-        for pattern in font_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            found_fonts.extend(matches)
+        for pattern in _FONT_RES:
+            found_fonts.extend(pattern.findall(content))
+
+        return self._check_fonts(found_fonts)
+
+    def _check_fonts(self, found_fonts: List[str]) -> Tuple[List[str], List[str]]:
+        """检查已找到的字体是否包含批准字体"""
+        violations = []
+        warnings = []
 
         for font in found_fonts:
             font_clean = font.strip().lower()
             # 检查发现的字体字符串中是否包含任何批准的字体
-            if not any(approved.lower() in font_clean for approved in self.guidelines.fonts):
+            if not any(approved in font_clean for approved in self._approved_fonts_lower):
                 violations.append(f"使用了未批准的字体: {font}")
 
         return violations, warnings
 
-    def validate_tone(self, content: str) -> Tuple[List[str], List[str]]:
+    def validate_tone(
+        self, content: str, content_lower: Optional[str] = None
+    ) -> Tuple[List[str], List[str]]:
         """
         验证语调和消息
+        content_lower: 可选的已转小写内容，由 validate() 传入以避免重复转换
         Returns: (violations, warnings)
         """
         violations = []
         warnings = []
 
         # 检查禁用词
-        content_lower = content.lower()
-        for word in self.guidelines.prohibited_words:
-            if word.lower() in content_lower:
-                violations.append(f"使用了禁用词/短语: '{word}'")
+        if content_lower is None:
+            content_lower = content.lower()
+        if self._prohibited_re is not None:
+            found = set(self._prohibited_re.findall(content_lower))
+            for word in self.guidelines.prohibited_words:
+                word_lower = word.lower()
+                if word_lower in found or (
+                    word_lower in self._overlapping_prohibited and word_lower in content_lower
+                ):
+                    violations.append(f"使用了禁用词/短语: '{word}'")
 
         # 检查语调关键词（应至少包含一些）
-        tone_matches = sum(
-            1 for keyword in self.guidelines.tone_keywords if keyword.lower() in content_lower
-        )
+        has_tone_keyword = self._tone_re is not None and self._tone_re.search(content_lower)
 
-        if tone_matches == 0 and len(content) > 100:
+        if not has_tone_keyword and len(content) > 100:
             warnings.append(
                 f"内容可能不符合品牌语调。 "
                 f"考虑使用这样的术语: {', '.join(self.guidelines.tone_keywords[:5])}"
@@ -119,17 +238,24 @@ class BrandValidator:
 
         return violations, warnings
 
-    def validate_brand_name(self, content: str) -> Tuple[List[str], List[str]]:
+    def validate_brand_name(
+        self, content: str, content_lower: Optional[str] = None
+    ) -> Tuple[List[str], List[str]]:
         """
         验证品牌名称的使用和大写
+        content_lower: 可选的已转小写内容，提供时先用子串计数快速排除不含品牌名称的内容
         Returns: (violations, warnings)
         """
-        violations = []
-        warnings = []
+        if content_lower is not None and content_lower.count(self._brand_name_lower) == 0:
+            return [], []
 
         # 查找品牌名称的所有变体
-        brand_pattern = re.compile(re.escape(self.guidelines.brand_name), re.IGNORECASE)
-        matches = brand_pattern.findall(content)
+        return self._check_brand_name(self._brand_name_re.findall(content))
+
+    def _check_brand_name(self, matches: List[str]) -> Tuple[List[str], List[str]]:
+        """检查已找到的品牌名称大写是否正确"""
+        violations = []
+        warnings = []
 
         for match in matches:
             if match != self.guidelines.brand_name:
@@ -148,56 +274,84 @@ class BrandValidator:
         score = max(0, 100 - violation_penalty - warning_penalty)
         return round(score, 2)
 
-    def generate_suggestions(self, violations: List[str], warnings: List[str]) -> List[str]:
-        """根据违规和警告生成有用的建议"""
+    def generate_suggestions(self, flagged: Set[str]) -> List[str]:
+        """
+        根据出现问题的检查类别生成有用的建议
+        flagged: 出现问题的类别，取值为 "color"、"font"、"tone"、"brand"
+        """
         suggestions = []
 
-        if any("color" in v.lower() for v in violations):
+        if "color" in flagged:
             suggestions.append(
                 f"使用批准的颜色: 主要: {', '.join(self.guidelines.primary_colors[:3])}"
             )
 
-        if any("font" in v.lower() for v in violations):
+        if "font" in flagged:
             suggestions.append(f"使用批准的字体: {', '.join(self.guidelines.fonts)}")
 
-        if any("tone" in w.lower() for w in warnings):
+        if "tone" in flagged:
             suggestions.append(
                 f"融入品牌语调关键词: {', '.join(self.guidelines.tone_keywords[:5])}"
             )
 
-        if any("brand name" in v.lower() for v in violations):
+        if "brand" in flagged:
             suggestions.append(f"始终将品牌名称大写为: {self.guidelines.brand_name}")
 
         return suggestions
 
     def validate(self, content: str) -> ValidationResult:
         """
-        执行完整的品牌验证
+        执行完整的品牌验证，相同内容的重复验证直接命中缓存
         Returns: ValidationResult
         """
+        result = self._validate_cached(content)
+        # 缓存中的结果在调用之间共享，返回列表字段的副本
+        return replace(
+            result,
+            violations=list(result.violations),
+            warnings=list(result.warnings),
+            suggestions=list(result.suggestions),
+        )
+
+    def _validate_uncached(self, content: str) -> ValidationResult:
+        """执行完整的品牌验证（不经过缓存）"""
         all_violations = []
         all_warnings = []
 
-        # 运行所有验证检查
-        color_v, color_w = self.validate_colors(content)
+        # 内容只转换一次小写，一次扫描收集颜色、字体和品牌名称，再按类别运行检查
+        content_lower = content.lower()
+        found = self._scan(content, content_lower)
+
+        color_v, color_w = self._check_colors(found["hex"] + found["rgb"])
         all_violations.extend(color_v)
         all_warnings.extend(color_w)
 
-        font_v, font_w = self.validate_fonts(content)
+        font_v, font_w = self._check_fonts(found["fontfam"] + found["font"])
         all_violations.extend(font_v)
         all_warnings.extend(font_w)
 
-        tone_v, tone_w = self.validate_tone(content)
+        tone_v, tone_w = self.validate_tone(content, content_lower)
         all_violations.extend(tone_v)
         all_warnings.extend(tone_w)
 
-        brand_v, brand_w = self.validate_brand_name(content)
+        brand_v, brand_w = self._check_brand_name(found["brand"])
         all_violations.extend(brand_v)
         all_warnings.extend(brand_w)
 
         # 计算分数并生成建议
         score = self.calculate_score(all_violations, all_warnings)
-        suggestions = self.generate_suggestions(all_violations, all_warnings)
+        # 按产生问题的检查直接标记类别，无需再扫描消息文本
+        flagged = {
+            category
+            for category, issues in (
+                ("color", color_v),
+                ("font", font_v),
+                ("tone", tone_w),
+                ("brand", brand_v),
+            )
+            if issues
+        }
+        suggestions = self.generate_suggestions(flagged)
 
         return ValidationResult(
             passed=len(all_violations) == 0,
@@ -224,8 +378,10 @@ def load_guidelines_from_json(filepath: str) -> BrandGuidelines:
         TypeError: 如果缺少必需字段
     """
     try:
-        with open(filepath, "r") as f:
-            data = json.load(f)
+        # 一次读入整个文件，交给 C 解码器单次解析
+        with open(filepath, "rb") as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
         return BrandGuidelines(**data)
     except FileNotFoundError:
         raise FileNotFoundError(f"找不到品牌指南文件: {filepath}")
@@ -291,32 +447,32 @@ def main():
     validator = BrandValidator(guidelines)
     result = validator.validate(test_content)
 
-    # 打印结果
-    print("=" * 60)
-    print("品牌验证报告")
-    print("=" * 60)
-    print(f"\n总体状态: {'✓ 通过' if result.passed else '✗ 失败'}")
-    print(f"合规分数: {result.score}/100")
+    # 收集报告行后一次性输出
+    lines = [
+        "=" * 60,
+        "品牌验证报告",
+        "=" * 60,
+        f"\n总体状态: {'✓ 通过' if result.passed else '✗ 失败'}",
+        f"合规分数: {result.score}/100",
+    ]
 
     if result.violations:
-        print(f"\n❌ 违规 ({len(result.violations)}):")
-        for i, violation in enumerate(result.violations, 1):
-            print(f"  {i}. {violation}")
+        lines.append(f"\n❌ 违规 ({len(result.violations)}):")
+        lines.extend(f"  {i}. {violation}" for i, violation in enumerate(result.violations, 1))
 
     if result.warnings:
-        print(f"\n⚠️  警告 ({len(result.warnings)}):")
-        for i, warning in enumerate(result.warnings, 1):
-            print(f"  {i}. {warning}")
+        lines.append(f"\n⚠️  警告 ({len(result.warnings)}):")
+        lines.extend(f"  {i}. {warning}" for i, warning in enumerate(result.warnings, 1))
 
     if result.suggestions:
-        print("\n💡 建议:")
-        for i, suggestion in enumerate(result.suggestions, 1):
-            print(f"  {i}. {suggestion}")
+        lines.append("\n💡 建议:")
+        lines.extend(f"  {i}. {suggestion}" for i, suggestion in enumerate(result.suggestions, 1))
 
-    print("\n" + "=" * 60)
+    lines.append("\n" + "=" * 60)
+    print("\n".join(lines))
 
     # 返回JSON以供程序化使用
-    return asdict(result)
+    return result.to_dict()
 
 
 if __name__ == "__main__":
@@ -3,10 +3,119 @@
 使用自由现金流预测实现企业估值。
 """
 
+import functools
+
 import numpy as np
+from numpy.polynomial.polynomial import polyval
 from typing import Dict, List, Any, Optional
 
 
+# 预测数据块中各行对应的项目（每行一项，每列一年）
+PROJECTION_ROWS = ("revenue", "ebitda", "ebit", "tax", "nopat", "capex", "nwc_change", "fcf")
+
+
+# DCF计算内核：只接受普通数组和标量，便于在敏感性分析等批量场景中复用
+
+
+def _project_line_items(
+    base_revenue: float,
+    revenue_growth: List[float],
+    ebitda_margin: List[float],
+    capex_percent: List[float],
+    nwc_percent: List[float],
+    tax_rate: float,
+    dtype: Any = np.float64,
+) -> np.ndarray:
+    """
+    按年预测各项财务数据。
+
+    Args:
+        base_revenue: 基准（最后历史年度）收入
+        revenue_growth: 各年收入增长率
+        ebitda_margin: 各年EBITDA利润率
+        capex_percent: 各年资本支出占收入百分比
+        nwc_percent: 各年营运资本占收入百分比
+        tax_rate: 企业税率
+        dtype: 计算与存储使用的浮点类型
+
+    Returns:
+        形状为 (len(PROJECTION_ROWS), 年数) 的连续数据块，行顺序同PROJECTION_ROWS
+    """
+    growth = np.asarray(revenue_growth, dtype=dtype)
+    margin = np.asarray(ebitda_margin, dtype=dtype)
+    capex_pct = np.asarray(capex_percent, dtype=dtype)
+    nwc_pct = np.asarray(nwc_percent, dtype=dtype)
+
+    block = np.empty((len(PROJECTION_ROWS), len(growth)), dtype=dtype)
+    revenue, ebitda, ebit, tax, nopat, capex, nwc_change, fcf = block
+
+    # 收入：基准收入按各年增长率累乘
+    np.cumprod(1 + growth, out=revenue)
+    revenue *= base_revenue
+
+    # EBITDA
+    np.multiply(revenue, margin, out=ebitda)
+
+    # 资本支出（为简单起见，假设折旧=资本支出）
+    np.multiply(revenue, capex_pct, out=capex)
+
+    # EBIT
+    np.subtract(ebitda, capex, out=ebit)
+
+    # 税费与NOPAT
+    np.multiply(ebit, tax_rate, out=tax)
+    np.subtract(ebit, tax, out=nopat)
+
+    # 营运资本变化（初始营运资本假设为基准收入的10%）
+    nwc = revenue * nwc_pct
+    nwc_change[0] = nwc[0] - base_revenue * 0.10
+    np.subtract(nwc[1:], nwc[:-1], out=nwc_change[1:])
+
+    # 自由现金流 = NOPAT + 折旧 - 资本支出 - 营运资本变化
+    np.add(nopat, capex, out=fcf)
+    fcf -= capex
+    fcf -= nwc_change
+
+    return block
+
+
+@functools.lru_cache(maxsize=128)
+def _discount_factors(wacc: float, years: int) -> np.ndarray:
+    """
+    计算第1至第years年的贴现因子 1 / (1 + WACC)^t。
+
+    结果按 (wacc, years) 缓存，返回的数组为只读，各次调用间共享。
+
+    Args:
+        wacc: WACC（小数形式）
+        years: 预测年数
+
+    Returns:
+        长度为years的贴现因子数组
+    """
+    factors = (1 + wacc) ** -np.arange(1, years + 1, dtype=np.float64)
+    factors.flags.writeable = False
+    return factors
+
+
+def _npv(fcf: np.ndarray, wacc: Any) -> np.ndarray:
+    """
+    计算第1年起各年现金流贴现到第0年的现值之和。
+
+    NPV即以 x = 1 / (1 + WACC) 为自变量、现金流为系数的多项式，
+    按Horner法则求值，避免逐年求幂。
+
+    Args:
+        fcf: 按年排列的一维现金流
+        wacc: WACC，可以是标量或数组（数组时结果沿用其浮点类型）
+
+    Returns:
+        与wacc同形状的现值之和
+    """
+    x = 1 / (1 + np.asarray(wacc))
+    return polyval(x, np.concatenate((np.zeros(1, dtype=fcf.dtype), fcf)))
+
+
 class DCFModel:
     """构建和计算DCF估值模型。"""
 
@@ -20,6 +129,7 @@ class DCFModel:
         self.company_name = company_name
         self.historical_financials = {}
         self.projections = {}
+        self.projection_block = None
         self.assumptions = {}
         self.wacc_components = {}
         self.valuation_results = {}
@@ -42,14 +152,18 @@ class DCFModel:
             nwc: 历史营运资本
             years: 历史年份
         """
+        revenue = np.asarray(revenue, dtype=np.float64)
+        ebitda = np.asarray(ebitda, dtype=np.float64)
+        capex = np.asarray(capex, dtype=np.float64)
+
         self.historical_financials = {
             "years": years,
             "revenue": revenue,
             "ebitda": ebitda,
             "capex": capex,
-            "nwc": nwc,
-            "ebitda_margin": [ebitda[i] / revenue[i] for i in range(len(revenue))],
-            "capex_percent": [capex[i] / revenue[i] for i in range(len(revenue))],
+            "nwc": np.asarray(nwc, dtype=np.float64),
+            "ebitda_margin": ebitda / revenue,
+            "capex_percent": capex / revenue,
         }
 
     def set_assumptions(
@@ -152,12 +266,15 @@ class DCFModel:
 
         return wacc
 
-    def project_cash_flows(self) -> Dict[str, List[float]]:
+    def project_cash_flows(self, dtype: Any = np.float64) -> Dict[str, np.ndarray]:
         """
         基于假设预测未来现金流。
 
+        Args:
+            dtype: 预测数据的浮点类型（大规模模拟时可用np.float32减半内存）
+
         Returns:
-            包含预测财务数据的字典
+            包含预测财务数据的字典（各项为按年排列的数组）
         """
         years = self.assumptions["projection_years"]
 
@@ -167,59 +284,22 @@ class DCFModel:
         else:
             base_revenue = 1000  # 默认基准
 
+        self.projection_block = _project_line_items(
+            base_revenue,
+            self.assumptions["revenue_growth"][:years],
+            self.assumptions["ebitda_margin"][:years],
+            self.assumptions["capex_percent"][:years],
+            self.assumptions["nwc_percent"][:years],
+            self.assumptions["tax_rate"],
+            dtype=dtype,
+        )
+
+        # 字典中的各项是数据块的行视图，不复制数据
         projections = {
-            "year": list(range(1, years + 1)),
-            "revenue": [],
-            "ebitda": [],
-            "ebit": [],
-            "tax": [],
-            "nopat": [],
-            "capex": [],
-            "nwc_change": [],
-            "fcf": [],
+            "year": np.arange(1, years + 1),
+            **dict(zip(PROJECTION_ROWS, self.projection_block)),
         }
 
-        prev_revenue = base_revenue
-        prev_nwc = base_revenue * 0.10  # 初始营运资本假设
-
-        for i in range(years):
-            # 收入
-            revenue = prev_revenue * (1 + self.assumptions["revenue_growth"][i])
-            projections["revenue"].append(revenue)
-
-            # EBITDA
-            ebitda = revenue * self.assumptions["ebitda_margin"][i]
-            projections["ebitda"].append(ebitda)
-
-            # EBIT（为简单起见，假设折旧=资本支出）
-            depreciation = revenue * self.assumptions["capex_percent"][i]
-            ebit = ebitda - depreciation
-            projections["ebit"].append(ebit)
-
-            # 税费
-            tax = ebit * self.assumptions["tax_rate"]
-            projections["tax"].append(tax)
-
-            # NOPAT
-            nopat = ebit - tax
-            projections["nopat"].append(nopat)
-
-            # 资本支出
-            capex = revenue * self.assumptions["capex_percent"][i]
-            projections["capex"].append(capex)
-
-            # 营运资本变化
-            nwc = revenue * self.assumptions["nwc_percent"][i]
-            nwc_change = nwc - prev_nwc
-            projections["nwc_change"].append(nwc_change)
-
-            # 自由现金流
-            fcf = nopat + depreciation - capex - nwc_change
-            projections["fcf"].append(fcf)
-
-            prev_revenue = revenue
-            prev_nwc = nwc
-
         self.projections = projections
         return projections
 
@@ -285,21 +365,17 @@ class DCFModel:
         wacc = self.wacc_components["wacc"]
         years = self.assumptions["projection_years"]
 
-        # 计算预测现金流的现值
-        pv_fcf = []
-        for i, fcf in enumerate(self.projections["fcf"]):
-            discount_factor = (1 + wacc) ** (i + 1)
-            pv = fcf / discount_factor
-            pv_fcf.append(pv)
-
-        total_pv_fcf = sum(pv_fcf)
+        # 计算预测现金流的现值（贴现因子向量同时用于终值）
+        fcf = np.asarray(self.projections["fcf"], dtype=np.float64)
+        discount_factors = _discount_factors(wacc, years)
+        pv_fcf = fcf * discount_factors
+        total_pv_fcf = _npv(fcf, wacc)
 
         # 计算终值
         terminal_value = self.calculate_terminal_value(terminal_method, exit_multiple)
 
         # 贴现终值
-        terminal_discount = (1 + wacc) ** years
-        pv_terminal = terminal_value / terminal_discount
+        pv_terminal = terminal_value * discount_factors[-1]
 
         # 企业价值
         enterprise_value = total_pv_fcf + pv_terminal
@@ -353,7 +429,12 @@ class DCFModel:
         return equity_results
 
     def sensitivity_analysis(
-        self, variable1: str, range1: List[float], variable2: str, range2: List[float]
+        self,
+        variable1: str,
+        range1: List[float],
+        variable2: str,
+        range2: List[float],
+        dtype: Any = np.float64,
     ) -> np.ndarray:
         """
         对估值进行双向敏感性分析。
@@ -363,46 +444,55 @@ class DCFModel:
             range1: 第一个变量的数值范围
             variable2: 要测试的第二个变量
             range2: 第二个变量的数值范围
+            dtype: 网格计算与结果的浮点类型（大网格可用np.float32减半内存）
 
         Returns:
             估值的二维数组
         """
-        results = np.zeros((len(range1), len(range2)))
-
-        # 存储原始值
-        orig_wacc = self.wacc_components.get("wacc", 0.10)
-        orig_growth = self.assumptions.get("terminal_growth", 0.03)
-        orig_margin = self.assumptions.get("ebitda_margin", [0.20] * 5)
-
-        for i, val1 in enumerate(range1):
-            for j, val2 in enumerate(range2):
-                # 更新第一个变量
-                if variable1 == "wacc":
-                    self.wacc_components["wacc"] = val1
-                elif variable1 == "growth":
-                    self.assumptions["terminal_growth"] = val1
-                elif variable1 == "margin":
-                    self.assumptions["ebitda_margin"] = [val1] * len(orig_margin)
-
-                # 更新第二个变量
-                if variable2 == "wacc":
-                    self.wacc_components["wacc"] = val2
-                elif variable2 == "growth":
-                    self.assumptions["terminal_growth"] = val2
-                elif variable2 == "margin":
-                    self.assumptions["ebitda_margin"] = [val2] * len(orig_margin)
-
-                # 重新计算
-                self.project_cash_flows()
-                valuation = self.calculate_enterprise_value()
-                results[i, j] = valuation["enterprise_value"]
-
-        # 恢复原始值
-        self.wacc_components["wacc"] = orig_wacc
-        self.assumptions["terminal_growth"] = orig_growth
-        self.assumptions["ebitda_margin"] = orig_margin
-
-        return results
+        shape = (len(range1), len(range2))
+
+        # 以原始假设重新预测一次现金流，网格中的各单元格不再修改模型状态
+        wacc = self.wacc_components.get("wacc")
+        if wacc is None and "wacc" not in (variable1, variable2):
+            raise ValueError("必须先计算WACC")
+        projections = self.project_cash_flows()
+        after_tax = 1 - self.assumptions["tax_rate"]
+
+        # 各变量的取值：未测试的变量保持标量，被测试的变量沿对应轴展开
+        grid = {
+            "wacc": wacc,
+            "growth": self.assumptions.get("terminal_growth", 0.03),
+            "margin": None,
+        }
+        axes = (
+            np.asarray(range1, dtype=dtype)[:, None],
+            np.asarray(range2, dtype=dtype)[None, :],
+        )
+        for name, axis in zip((variable1, variable2), axes):
+            if name in grid:
+                grid[name] = axis
+
+        wacc = np.asarray(grid["wacc"], dtype=dtype)
+        growth = np.asarray(grid["growth"], dtype=dtype)
+        fcf = projections["fcf"].astype(dtype, copy=False)
+        years = len(fcf)
+
+        # 现值之和只随WACC变化，按WACC轴求值，不会生成 range1 x range2 x 年份 的中间数组
+        if grid["margin"] is None:
+            pv_fcf = _npv(fcf, wacc)
+            final_fcf = fcf[-1]
+        else:
+            # FCF对EBITDA利润率是线性的：FCF = 收入 * (1 - 税率) * 利润率 + 与利润率无关的部分
+            margin_free_fcf = fcf - projections["ebitda"].astype(dtype, copy=False) * after_tax
+            fcf_per_margin = projections["revenue"].astype(dtype, copy=False) * after_tax
+            pv_fcf = _npv(margin_free_fcf, wacc) + grid["margin"] * _npv(fcf_per_margin, wacc)
+            final_fcf = margin_free_fcf[-1] + grid["margin"] * fcf_per_margin[-1]
+
+        # 预测期现金流现值 + 戈登增长终值现值
+        terminal_value = final_fcf * (1 + growth) / (wacc - growth)
+        pv_terminal = terminal_value / (1 + wacc) ** years
+
+        return np.broadcast_to(pv_fcf + pv_terminal, shape).copy()
 
     def generate_summary(self) -> str:
         """
@@ -461,8 +551,14 @@ def calculate_beta(stock_returns: List[float], market_returns: List[float]) -> f
     Returns:
         贝塔系数
     """
-    covariance = np.cov(stock_returns, market_returns)[0, 1]
-    market_variance = np.var(market_returns)
+    stock = np.asarray(stock_returns, dtype=np.float64)
+    market = np.asarray(market_returns, dtype=np.float64)
+
+    # 中心化后一次点积得到协方差与方差的分子（与原实现一致：协方差为样本口径，方差为总体口径）
+    stock_centered = stock - stock.mean()
+    market_centered = market - market.mean()
+    covariance = np.dot(stock_centered, market_centered) / (len(market) - 1)
+    market_variance = np.dot(market_centered, market_centered) / len(market)
     beta = covariance / market_variance if market_variance != 0 else 1.0
     return beta
 
@@ -3,10 +3,17 @@
 测试变量变化对关键输出的影响。
 """
 
+import copy
+
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Any, Optional, Tuple, Callable
 
+try:
+    from scipy.optimize import brentq
+except ImportError:  # scipy为可选依赖，缺失时使用二分搜索
+    brentq = None
+
 
 class SensitivityAnalyzer:
     """对金融模型执行敏感性分析。"""
@@ -50,28 +57,26 @@ class SensitivityAnalyzer:
         max_val = base_value * (1 + range_pct)
         test_values = np.linspace(min_val, max_val, steps)
 
-        results = []
-        for value in test_values:
+        outputs = np.empty(steps)
+        for k, value in enumerate(test_values):
             # 更新模型
             model_update_func(value)
 
             # 计算输出
-            output = output_func()
-
-            results.append(
-                {
-                    "variable": variable_name,
-                    "value": value,
-                    "pct_change": (value - base_value) / base_value * 100,
-                    "output": output,
-                    "output_change": output - self.base_output if self.base_output else 0,
-                }
-            )
+            outputs[k] = output_func()
 
         # 重置为基准值
         model_update_func(base_value)
 
-        return pd.DataFrame(results)
+        return pd.DataFrame(
+            {
+                "variable": np.full(steps, variable_name, dtype=object),
+                "value": test_values,
+                "pct_change": (test_values - base_value) / base_value * 100,
+                "output": outputs,
+                "output_change": outputs - self.base_output if self.base_output else 0.0,
+            }
+        )
 
     def two_way_sensitivity(
         self,
@@ -137,45 +142,56 @@ class SensitivityAnalyzer:
         Returns:
             按影响幅度排序的DataFrame
         """
-        # 存储基准输出
-        self.base_output = output_func()
-
-        tornado_data = []
-
-        for var_name, var_info in variables.items():
-            # 测试低值
-            var_info["update_func"](var_info["low"])
-            low_output = output_func()
-
-            # 测试高值
-            var_info["update_func"](var_info["high"])
-            high_output = output_func()
-
-            # 重置为基准值
-            var_info["update_func"](var_info["base"])
-
-            # 计算影响
-            impact = high_output - low_output
-            low_delta = low_output - self.base_output
-            high_delta = high_output - self.base_output
-
-            tornado_data.append(
-                {
-                    "variable": var_name,
-                    "base_value": var_info["base"],
-                    "low_value": var_info["low"],
-                    "high_value": var_info["high"],
-                    "low_output": low_output,
-                    "high_output": high_output,
-                    "low_delta": low_delta,
-                    "high_delta": high_delta,
-                    "impact": abs(impact),
-                    "impact_pct": abs(impact) / self.base_output * 100,
-                }
-            )
+        # 只快照模型上与被测变量同名的属性；整体深拷贝模型会在其持有锁、客户端等
+        # 不可复制的状态时失败
+        model_attrs = getattr(self.base_model, "__dict__", {})
+        saved_state = {
+            name: copy.deepcopy(model_attrs[name]) for name in variables if name in model_attrs
+        }
+
+        low_outputs = np.empty(len(variables))
+        high_outputs = np.empty(len(variables))
+
+        try:
+            # 存储基准输出
+            self.base_output = output_func()
+
+            for k, var_info in enumerate(variables.values()):
+                try:
+                    # 测试低值
+                    var_info["update_func"](var_info["low"])
+                    low_outputs[k] = output_func()
+
+                    # 测试高值
+                    var_info["update_func"](var_info["high"])
+                    high_outputs[k] = output_func()
+                finally:
+                    # 重置为基准值（后续变量须在其他变量为基准值时测试）
+                    var_info["update_func"](var_info["base"])
+        finally:
+            # 即使output_func抛出异常，也恢复被测属性的快照
+            for name, value in saved_state.items():
+                setattr(self.base_model, name, value)
+
+        # 计算影响
+        impact = np.abs(high_outputs - low_outputs)
+
+        df = pd.DataFrame(
+            {
+                "variable": list(variables),
+                "base_value": [v["base"] for v in variables.values()],
+                "low_value": [v["low"] for v in variables.values()],
+                "high_value": [v["high"] for v in variables.values()],
+                "low_output": low_outputs,
+                "high_output": high_outputs,
+                "low_delta": low_outputs - self.base_output,
+                "high_delta": high_outputs - self.base_output,
+                "impact": impact,
+                "impact_pct": impact / self.base_output * 100,
+            }
+        )
 
         # 按影响排序
-        df = pd.DataFrame(tornado_data)
         df = df.sort_values("impact", ascending=False)
 
         return df
@@ -199,7 +215,9 @@ class SensitivityAnalyzer:
         Returns:
             包含情景结果的DataFrame
         """
-        results = []
+        names = []
+        probabilities = []
+        outputs = []
 
         for scenario_name, variables in scenarios.items():
             # 更新此情景的所有变量
@@ -208,45 +226,42 @@ class SensitivityAnalyzer:
                     variable_updates[var_name](value)
 
             # 计算输出
-            output = output_func()
+            outputs.append(output_func())
 
             # 如果提供，获取概率
-            prob = (
+            probabilities.append(
                 probability_weights.get(scenario_name, 1 / len(scenarios))
                 if probability_weights
                 else 1 / len(scenarios)
             )
-
-            results.append(
-                {
-                    "scenario": scenario_name,
-                    "probability": prob,
-                    "output": output,
-                    **variables,  # 包含所有变量值
-                }
-            )
+            names.append(scenario_name)
 
             # 重置模型（简化版 - 应恢复所有基准值）
 
-        df = pd.DataFrame(results)
-
         # 计算期望值
-        df["weighted_output"] = df["output"] * df["probability"]
-        expected_value = df["weighted_output"].sum()
-
-        # 添加汇总行
-        summary = pd.DataFrame(
-            [
-                {
-                    "scenario": "期望值",
-                    "probability": 1.0,
-                    "output": expected_value,
-                    "weighted_output": expected_value,
-                }
-            ]
-        )
-
-        df = pd.concat([df, summary], ignore_index=True)
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        outputs = np.asarray(outputs, dtype=np.float64)
+        weighted_output = outputs * probabilities
+        expected_value = weighted_output.sum()
+
+        # 从一个列字典构建DataFrame：与固定列同名的变量在其出现的情景中覆盖该列的值（与逐行
+        # 合并字典相同），而不是引发列名冲突；末尾追加期望值汇总行（变量列为NaN）
+        columns = {
+            "scenario": names,
+            "probability": probabilities.tolist(),
+            "output": outputs.tolist(),
+        }
+        for name in dict.fromkeys(name for v in scenarios.values() for name in v):
+            defaults = columns.get(name, [np.nan] * len(names))
+            columns[name] = [v.get(name, d) for v, d in zip(scenarios.values(), defaults)]
+        columns["weighted_output"] = weighted_output.tolist()
+        summary = {
+            "scenario": "期望值",
+            "probability": 1.0,
+            "output": expected_value,
+            "weighted_output": expected_value,
+        }
+        df = pd.DataFrame({key: [*col, summary.get(key, np.nan)] for key, col in columns.items()})
 
         return df
 
@@ -259,6 +274,7 @@ class SensitivityAnalyzer:
         min_search: float,
         max_search: float,
         tolerance: float = 0.01,
+        fast: bool = False,
     ) -> float:
         """
         找到输出等于目标的盈亏平衡点。
@@ -270,11 +286,37 @@ class SensitivityAnalyzer:
             target_value: 目标输出值
             min_search: 最小搜索范围
             max_search: 最大搜索范围
-            tolerance: 收敛容差
+            tolerance: 收敛容差；Brent法中约束变量值的精度（xtol），二分搜索中同时约束搜索区间
+                宽度和输出与目标值的差距
+            fast: 是否先在固定网格上求值并线性插值（适用于输出单调且近似线性的情况）
 
         Returns:
             变量的盈亏平衡值
         """
+
+        def objective(value: float) -> float:
+            variable_update(value)
+            return output_func() - target_value
+
+        # 快速路径：固定21个网格点求值，输出单调且覆盖目标值时直接线性插值
+        if fast:
+            grid = np.linspace(min_search, max_search, 21)
+            gaps = np.array([objective(value) for value in grid])
+            steps = np.diff(gaps)
+            if np.all(steps > 0) and gaps[0] <= 0 <= gaps[-1]:
+                return float(np.interp(0.0, gaps, grid))
+            if np.all(steps < 0) and gaps[-1] <= 0 <= gaps[0]:
+                return float(np.interp(0.0, gaps[::-1], grid[::-1]))
+
+        # 优先使用Brent法（二分与逆二次插值结合，超线性收敛），所需模型重算次数更少
+        if brentq is not None:
+            try:
+                return brentq(objective, min_search, max_search, xtol=tolerance)
+            except (ValueError, RuntimeError):
+                # 搜索区间两端未跨越目标值（ValueError）或未在迭代上限内收敛（RuntimeError），
+                # 退回二分搜索
+                pass
+
         # 二分搜索求盈亏平衡点
         low = min_search
         high = max_search
@@ -298,6 +340,7 @@ def create_data_table(
     row_variable: Tuple[str, List[float], Callable],
     col_variable: Tuple[str, List[float], Callable],
     output_func: Callable,
+    vectorized_output: Optional[Callable[[np.ndarray, np.ndarray], np.ndarray]] = None,
 ) -> pd.DataFrame:
     """
     为两个变量创建Excel风格的数据表。
@@ -306,6 +349,8 @@ def create_data_table(
         row_variable: (名称, 值, 更新函数)
         col_variable: (名称, 值, 更新函数)
         output_func: 计算输出的函数
+        vectorized_output: 可选，直接由行、列变量网格数组计算输出的函数；
+            提供时一次广播计算整张表，不再逐格更新模型
 
     Returns:
         格式化为数据表的DataFrame
@@ -313,13 +358,17 @@ def create_data_table(
     row_name, row_values, row_update = row_variable
     col_name, col_values, col_update = col_variable
 
-    results = np.zeros((len(row_values), len(col_values)))
+    if vectorized_output is not None:
+        row_grid, col_grid = np.meshgrid(row_values, col_values, indexing="ij")
+        results = np.asarray(vectorized_output(row_grid, col_grid), dtype=np.float64)
+    else:
+        results = np.zeros((len(row_values), len(col_values)))
 
-    for i, row_val in enumerate(row_values):
-        for j, col_val in enumerate(col_values):
-            row_update(row_val)
-            col_update(col_val)
-            results[i, j] = output_func()
+        for i, row_val in enumerate(row_values):
+            for j, col_val in enumerate(col_values):
+                row_update(row_val)
+                col_update(col_val)
+                results[i, j] = output_func()
 
     df = pd.DataFrame(
         results,
@@ -385,3 +434,13 @@ if __name__ == "__main__":
     tornado = analyzer.tornado_analysis(variables, model.calculate_value)
     print("\n龙卷风分析:")
     print(tornado[["variable", "impact", "impact_pct"]])
+
+    # 数据表：输出仅取决于收入和利润率，可直接对网格数组广播计算
+    table = create_data_table(
+        row_variable=("收入", [800, 1000, 1200], lambda x: setattr(model, "revenue", x)),
+        col_variable=("利润率", [0.15, 0.20, 0.25], lambda x: setattr(model, "margin", x)),
+        output_func=model.calculate_value,
+        vectorized_output=lambda revenue, margin: revenue * margin * model.multiple,
+    )
+    print("\n数据表:")
+    print(table)
@@ -9,10 +9,136 @@
 - 删除技能
 """
 
+import copy
+import logging
+import os
+import re
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Tuple
+import httpx
+import yaml
 from anthropic import Anthropic
-from anthropic.lib import files_from_dir
+
+_log = logging.getLogger(__name__)
+
+# 优先使用libyaml的C加载器，不可用时回退到纯Python实现
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# 并发读取技能文件的线程数
+UPLOAD_WORKERS = 8
+# 并发删除技能版本的线程数
+DELETE_WORKERS = 10
+# 技能目录总大小上限
+MAX_SKILL_SIZE = 8 * 1024 * 1024
+# 验证前导块时从SKILL.md读取的字节数
+FRONTMATTER_READ_BYTES = 4096
+# SKILL.md开头的YAML前导块
+FRONTMATTER_RE = re.compile(r"\A---[ \t]*\r?\n(.*?)^---", re.S | re.M)
+
+# 共享HTTP客户端的连接池配置，容纳并发上传/删除
+HTTP_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16)
+HTTP_TIMEOUT = 30.0
+
+# 查询结果缓存的有效期（秒）：列表和"latest"变化较快，具体版本不可变
+SKILL_LIST_TTL = 30
+LATEST_VERSION_TTL = 10
+PINNED_VERSION_TTL = 24 * 60 * 60
+
+# 进程内缓存：客户端 -> {键 -> (过期时间, 值)}。按客户端分开存放，不同API密钥或工作区的
+# 客户端不会共享查询结果；客户端被回收时其缓存随之释放。_VERSION记录每个技能的失效代数
+_CACHE: "weakref.WeakKeyDictionary[Anthropic, Dict[tuple, Tuple[float, Any]]]" = (
+    weakref.WeakKeyDictionary()
+)
+_VERSION: Dict[str, int] = {}
+
+
+def _cache_get(client: Anthropic, key: tuple) -> Any:
+    """返回该客户端未过期的缓存值（深拷贝），未命中时返回None。"""
+    cache = _CACHE.get(client)
+    entry = cache.get(key) if cache is not None else None
+    if entry is None:
+        return None
+    expires_at, value = entry
+    if time.monotonic() >= expires_at:
+        cache.pop(key, None)
+        return None
+    return copy.deepcopy(value)
+
+
+def _cache_set(client: Anthropic, key: tuple, value: Any, ttl: float) -> None:
+    """为该客户端缓存值，ttl秒后过期。"""
+    _CACHE.setdefault(client, {})[key] = (time.monotonic() + ttl, copy.deepcopy(value))
+
+
+def _invalidate_skill(skill_id: Optional[str] = None) -> None:
+    """使所有客户端的技能列表以及指定技能的版本缓存失效（多个客户端可能指向同一工作区）。"""
+    if skill_id is not None:
+        _VERSION[skill_id] = _VERSION.get(skill_id, 0) + 1
+    for cache in list(_CACHE.values()):
+        cache.pop(("skills",), None)
+        if skill_id is not None:
+            for key in [k for k in cache if k[1:2] == (skill_id,)]:
+                del cache[key]
+
+
+def clear_skill_cache() -> None:
+    """清空所有技能查询缓存。"""
+    _CACHE.clear()
+    _VERSION.clear()
+
+
+def make_client(api_key: Optional[str] = None, **kwargs: Any) -> Anthropic:
+    """
+    创建配置好连接池的Anthropic客户端。
+
+    底层httpx客户端启用HTTP/2（安装了h2时）并放宽连接池上限，多个请求可复用同一连接，
+    本模块中的并发调用也不会因连接池过小而排队。应在整个会话中复用返回的客户端。
+
+    Args:
+        api_key: Anthropic API密钥（默认读取ANTHROPIC_API_KEY环境变量）
+        **kwargs: 传递给Anthropic构造函数的其他参数
+
+    Returns:
+        Anthropic客户端实例
+
+    Example:
+        >>> client = make_client()
+        >>> skills = list_custom_skills(client)
+    """
+    try:
+        http_client = httpx.Client(http2=True, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+    except ImportError:
+        # 未安装h2时回退到HTTP/1.1，仍保留更大的连接池
+        http_client = httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+
+    return Anthropic(api_key=api_key, http_client=http_client, **kwargs)
+
+
+def _read_skill_files(
+    skill_path: str, max_workers: int = UPLOAD_WORKERS
+) -> List[Tuple[str, bytes]]:
+    """
+    并发读取技能目录中的所有文件，生成与files_from_dir相同的上传列表。
+
+    文件名相对于技能目录的父目录（即以技能目录名开头），与SDK的约定一致。
+
+    Args:
+        skill_path: 技能目录路径
+        max_workers: 读取文件的线程数
+
+    Returns:
+        (相对路径, 文件内容) 元组列表
+    """
+    skill_dir = Path(skill_path)
+    paths = [p for p in skill_dir.rglob("*") if p.is_file()]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        contents = list(executor.map(Path.read_bytes, paths))
+
+    return [(p.relative_to(skill_dir.parent).as_posix(), data) for p, data in zip(paths, contents)]
 
 
 def create_skill(client: Anthropic, skill_path: str, display_title: str) -> Dict[str, Any]:
@@ -56,11 +182,13 @@ def create_skill(client: Anthropic, skill_path: str, display_title: str) -> Dict
         if not skill_md.exists():
             return {"success": False, "error": f"SKILL.md not found in {skill_path}"}
 
-        # 使用files_from_dir创建技能
+        # 并发读取文件后一次性上传创建技能
         skill = client.beta.skills.create(
-            display_title=display_title, files=files_from_dir(skill_path)
+            display_title=display_title, files=_read_skill_files(skill_path)
         )
 
+        _invalidate_skill()
+
         return {
             "success": True,
             "skill_id": skill.id,
@@ -89,6 +217,10 @@ def list_custom_skills(client: Anthropic) -> List[Dict[str, Any]]:
         >>> for skill in skills:
         ...     print(f"{skill['display_title']}: {skill['skill_id']}")
     """
+    cached = _cache_get(client, ("skills",))
+    if cached is not None:
+        return cached
+
     try:
         skills_response = client.beta.skills.list(source="custom")
 
@@ -104,10 +236,11 @@ def list_custom_skills(client: Anthropic) -> List[Dict[str, Any]]:
                 }
             )
 
+        _cache_set(client, ("skills",), skills, SKILL_LIST_TTL)
         return skills
 
-    except Exception as e:
-        print(f"Error listing skills: {e}")
+    except Exception:
+        _log.exception("Error listing skills")
         return []
 
 
@@ -125,15 +258,25 @@ def get_skill_version(
     Returns:
         包含版本详情的字典，如果未找到则返回None
     """
+    generation = _VERSION.get(skill_id, 0)
+    key = ("version", skill_id, generation, version)
+    cached = _cache_get(client, key)
+    if cached is not None:
+        return cached
+
     try:
-        # 如果未指定，获取最新版本
+        # 如果未指定，获取最新版本；具体版本不可变，已缓存时无需再请求版本详情
         if version == "latest":
             skill = client.beta.skills.retrieve(skill_id)
             version = skill.latest_version
+            pinned = _cache_get(client, ("version", skill_id, generation, version))
+            if pinned is not None:
+                _cache_set(client, key, pinned, LATEST_VERSION_TTL)
+                return pinned
 
         version_info = client.beta.skills.versions.retrieve(skill_id=skill_id, version=version)
 
-        return {
+        info = {
             "version": version_info.version,
             "skill_id": version_info.skill_id,
             "name": version_info.name,
@@ -141,9 +284,13 @@ def get_skill_version(
             "directory": version_info.directory,
             "created_at": version_info.created_at,
         }
+        _cache_set(client, ("version", skill_id, generation, version), info, PINNED_VERSION_TTL)
+        if key[-1] == "latest":
+            _cache_set(client, key, info, LATEST_VERSION_TTL)
+        return info
 
-    except Exception as e:
-        print(f"Error getting skill version: {e}")
+    except Exception:
+        _log.exception("Error getting skill version")
         return None
 
 
@@ -161,8 +308,9 @@ def create_skill_version(client: Anthropic, skill_id: str, skill_path: str) -> D
     """
     try:
         version = client.beta.skills.versions.create(
-            skill_id=skill_id, files=files_from_dir(skill_path)
+            skill_id=skill_id, files=_read_skill_files(skill_path)
         )
+        _invalidate_skill(skill_id)
 
         return {
             "success": True,
@@ -187,25 +335,80 @@ def delete_skill(client: Anthropic, skill_id: str, delete_versions: bool = True)
         delete_versions: 是否首先删除所有版本
 
     Returns:
-        如果成功则返回True，否则返回False
+        如果成功则返回True，否则返回False（需要删除计数时使用delete_skill_detailed）
+    """
+    return delete_skill_detailed(client, skill_id, delete_versions)["success"]
+
+
+def delete_skill_detailed(
+    client: Anthropic, skill_id: str, delete_versions: bool = True
+) -> Dict[str, Any]:
+    """
+    删除自定义技能并可选地删除其所有版本，返回包含各版本删除情况的结果。
+
+    注意：必须先删除所有版本，然后才能删除技能。
+
+    Args:
+        client: Anthropic客户端实例
+        skill_id: 要删除的技能ID
+        delete_versions: 是否首先删除所有版本
+
+    Returns:
+        删除结果的字典：
+        {
+            'success': bool,
+            'skill_id': str,
+            'deleted_versions': int,
+            'failed_versions': List[str],
+            'error': str (如果失败)
+        }
     """
+    result = {"success": False, "skill_id": skill_id, "deleted_versions": 0, "failed_versions": []}
+
     try:
         if delete_versions:
             # 首先删除所有版本
             versions = client.beta.skills.versions.list(skill_id=skill_id)
 
-            for version in versions.data:
-                client.beta.skills.versions.delete(skill_id=skill_id, version=version.version)
-                print(f"  Deleted version: {version.version}")
+            # 各版本的删除请求相互独立，并发发出
+            with ThreadPoolExecutor(max_workers=DELETE_WORKERS) as executor:
+                futures = {
+                    executor.submit(
+                        client.beta.skills.versions.delete,
+                        skill_id=skill_id,
+                        version=version.version,
+                    ): version.version
+                    for version in versions.data
+                }
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                        result["deleted_versions"] += 1
+                        _log.debug("Deleted version %s of skill %s", futures[future], skill_id)
+                    except Exception as e:
+                        result["failed_versions"].append(futures[future])
+                        _log.warning("Error deleting version %s: %s", futures[future], e)
+
+            _invalidate_skill(skill_id)
+
+            # 仍有版本残留时无法删除技能本身
+            if result["failed_versions"]:
+                result["error"] = (
+                    f"{len(result['failed_versions'])} version(s) could not be deleted"
+                )
+                return result
 
         # 然后删除技能本身
         client.beta.skills.delete(skill_id)
-        print(f"✓ Deleted skill: {skill_id}")
-        return True
+        _invalidate_skill(skill_id)
+        _log.info("Deleted skill %s", skill_id)
+        result["success"] = True
+        return result
 
     except Exception as e:
-        print(f"Error deleting skill: {e}")
-        return False
+        _log.exception("Error deleting skill %s", skill_id)
+        result["error"] = str(e)
+        return result
 
 
 def test_skill(
@@ -267,6 +470,11 @@ def list_skill_versions(client: Anthropic, skill_id: str) -> List[Dict[str, Any]
     Returns:
         版本字典列表
     """
+    key = ("versions", skill_id, _VERSION.get(skill_id, 0))
+    cached = _cache_get(client, key)
+    if cached is not None:
+        return cached
+
     try:
         versions_response = client.beta.skills.versions.list(skill_id=skill_id)
 
@@ -280,13 +488,27 @@ def list_skill_versions(client: Anthropic, skill_id: str) -> List[Dict[str, Any]
                 }
             )
 
+        _cache_set(client, key, versions, SKILL_LIST_TTL)
         return versions
 
-    except Exception as e:
-        print(f"Error listing versions: {e}")
+    except Exception:
+        _log.exception("Error listing versions")
         return []
 
 
+def _scan_tree(path: Path) -> Iterator[os.DirEntry]:
+    """
+    使用os.scandir递归遍历目录，逐个产出条目（不跟随符号链接）。
+
+    DirEntry的类型信息来自目录读取本身，无需为每个条目额外调用stat。
+    """
+    with os.scandir(path) as entries:
+        for entry in entries:
+            yield entry
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scan_tree(entry.path)
+
+
 def validate_skill_directory(skill_path: str) -> Dict[str, Any]:
     """
     上传前验证技能目录结构。
@@ -319,63 +541,95 @@ def validate_skill_directory(skill_path: str) -> Dict[str, Any]:
         result["valid"] = False
         result["errors"].append("SKILL.md file is required")
     else:
-        # 读取并验证SKILL.md
-        content = skill_md.read_text()
+        # 前导块最多1024个字符，只需读取文件开头即可完成验证
+        with skill_md.open("rb") as f:
+            head = f.read(FRONTMATTER_READ_BYTES)
+        content = head.decode("utf-8", errors="ignore")
 
         # 检查YAML前导块
+        match = FRONTMATTER_RE.match(content)
+        if match is None and len(head) == FRONTMATTER_READ_BYTES and content.startswith("---"):
+            # 读取范围内未找到结束标记：读取整个文件再匹配，以区分超长的前导块（报告实际
+            # 长度）和未闭合的前导块（格式错误）
+            content = skill_md.read_bytes().decode("utf-8", errors="ignore")
+            match = FRONTMATTER_RE.match(content)
+
         if not content.startswith("---"):
             result["valid"] = False
             result["errors"].append("SKILL.md must start with YAML frontmatter (---)")
+        elif match is None:
+            result["valid"] = False
+            result["errors"].append("Invalid YAML frontmatter format")
         else:
-            # 提取前导块
+            frontmatter = match.group(1).strip()
+
             try:
-                end_idx = content.index("---", 3)
-                frontmatter = content[3:end_idx].strip()
+                fields = yaml.load(frontmatter, Loader=_YAML_LOADER) or {}
+            except yaml.YAMLError:
+                fields = None
 
+            if not isinstance(fields, dict):
+                result["valid"] = False
+                result["errors"].append("Invalid YAML frontmatter format")
+            else:
                 # 检查必需字段
-                if "name:" not in frontmatter:
+                if "name" not in fields:
                     result["valid"] = False
                     result["errors"].append("YAML frontmatter must include 'name' field")
 
-                if "description:" not in frontmatter:
+                if "description" not in fields:
                     result["valid"] = False
                     result["errors"].append("YAML frontmatter must include 'description' field")
 
-                # 检查前导块大小
-                if len(frontmatter) > 1024:
-                    result["valid"] = False
-                    result["errors"].append(
-                        f"YAML frontmatter exceeds 1024 chars (found: {len(frontmatter)})"
-                    )
-
-            except ValueError:
+            # 检查前导块大小
+            if len(frontmatter) > 1024:
                 result["valid"] = False
-                result["errors"].append("Invalid YAML frontmatter format")
+                result["errors"].append(
+                    f"YAML frontmatter exceeds 1024 chars (found: {len(frontmatter)})"
+                )
+
+    # 单次遍历统计总大小、文件/目录数量和常见文件，超过上限后立即停止
+    root = os.fspath(skill_dir)
+    scripts_path = None
+    total_size = 0
+    file_count = 0
+    directory_count = 0
+    has_reference = False
+    script_files = []
+    for entry in _scan_tree(skill_dir):
+        parent = os.path.dirname(entry.path)
+        if entry.is_dir(follow_symlinks=False):
+            directory_count += 1
+            if parent == root and entry.name == "scripts":
+                scripts_path = entry.path
+        elif entry.is_file(follow_symlinks=False):
+            file_count += 1
+            if parent == root and entry.name == "REFERENCE.md":
+                has_reference = True
+            elif parent == scripts_path:
+                script_files.append(entry.name)
+            total_size += entry.stat(follow_symlinks=False).st_size
+            if total_size > MAX_SKILL_SIZE:
+                break
 
-    # 检查总大小
-    total_size = sum(f.stat().st_size for f in skill_dir.rglob("*") if f.is_file())
     result["info"]["total_size_mb"] = total_size / (1024 * 1024)
 
-    if total_size > 8 * 1024 * 1024:
+    if total_size > MAX_SKILL_SIZE:
+        # 遍历已提前结束，大小只是下限，数量和常见文件信息不完整因此不填写
         result["valid"] = False
         result["errors"].append(
-            f"Total size exceeds 8MB (found: {total_size / (1024 * 1024):.2f} MB)"
+            f"Total size exceeds 8MB (found: >= {total_size / (1024 * 1024):.2f} MB)"
         )
+    else:
+        result["info"]["file_count"] = file_count
+        result["info"]["directory_count"] = directory_count
 
-    # 统计文件
-    files = list(skill_dir.rglob("*"))
-    result["info"]["file_count"] = len([f for f in files if f.is_file()])
-    result["info"]["directory_count"] = len([f for f in files if f.is_dir()])
-
-    # 检查常见文件
-    if (skill_dir / "REFERENCE.md").exists():
-        result["info"]["has_reference"] = True
+        if has_reference:
+            result["info"]["has_reference"] = True
 
-    if (skill_dir / "scripts").exists():
-        result["info"]["has_scripts"] = True
-        result["info"]["script_files"] = [
-            f.name for f in (skill_dir / "scripts").iterdir() if f.is_file()
-        ]
+        if scripts_path is not None:
+            result["info"]["has_scripts"] = True
+            result["info"]["script_files"] = script_files
 
     return result
 
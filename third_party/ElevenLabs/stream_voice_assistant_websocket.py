@@ -23,9 +23,11 @@
        - 重复或按Ctrl+C退出
 
 关键优化：
-- 从Claude收到的文本块立即发送到TTS
-- 无需句子缓冲 - 音频生成立即开始
-- MP3音频格式与免费套餐兼容
+- 从Claude收到的第一个文本块立即发送到TTS，音频生成立即开始
+- 后续文本块按词/标点边界或短时间窗口合并发送，减少WebSocket帧数
+- MP3音频格式与免费套餐兼容；付费套餐可通过 ELEVENLABS_OUTPUT_FORMAT=pcm_44100
+  直接接收PCM，免去逐块MP3解码
+- MP3数据按帧同步字切分，只解码完整帧，避免对半帧反复调用解码器
 - 带预缓冲的连续音频流防止爆音
 """
 
@@ -33,6 +35,7 @@ import base64
 import io
 import json
 import os
+import re
 import threading
 import time
 
@@ -43,8 +46,18 @@ import sounddevice as sd
 import websocket
 from dotenv import load_dotenv
 from pydub import AudioSegment
+from pydub.exceptions import CouldntDecodeError
 from scipy.io import wavfile
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，缺失时回退到标准库 json
+    orjson = None
+
+# WebSocket消息的编解码；orjson.dumps返回bytes，websocket-client会原样作为文本帧发送
+json_dumps = orjson.dumps if orjson is not None else json.dumps
+json_loads = orjson.loads if orjson is not None else json.loads
+
 # 从 .env 文件加载环境变量
 load_dotenv()
 
@@ -56,6 +69,7 @@ assert ANTHROPIC_API_KEY is not None, "错误：未找到ANTHROPIC_API_KEY。请
 
 SAMPLE_RATE = 44100  # 录音音频采样率
 CHANNELS = 1  # 单声道音频
+RECORD_BUFFER_SECONDS = 30  # 录音缓冲区预分配时长（秒），超出时自动扩容
 
 elevenlabs_client = elevenlabs.ElevenLabs(
     api_key=ELEVENLABS_API_KEY,
@@ -66,32 +80,104 @@ anthropic_client = anthropic.Anthropic(
     api_key=ANTHROPIC_API_KEY
 )
 
-# 获取可用语音并选择第一个
-voices = elevenlabs_client.voices.search().voices
-selected_voice = voices[0]
-VOICE_ID = selected_voice.voice_id
-print(f"使用语音: {selected_voice.name} (ID: {VOICE_ID})")
+# 选中的语音缓存在本地文件中，避免每次启动都请求语音列表；设置REFRESH_VOICES=1可强制重新获取
+VOICE_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".voice_cache.json")
+
+
+def load_voice():
+    """返回要使用的语音 (voice_id, name)，优先读取本地缓存。
+
+    Returns:
+        tuple: (语音ID, 语音名称)
+    """
+    if os.getenv("REFRESH_VOICES") != "1":
+        try:
+            with open(VOICE_CACHE_PATH, encoding="utf-8") as f:
+                cached = json.load(f)
+            return cached["voice_id"], cached["name"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    # 获取可用语音并选择第一个
+    selected_voice = elevenlabs_client.voices.search().voices[0]
+    try:
+        with open(VOICE_CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump({"voice_id": selected_voice.voice_id, "name": selected_voice.name}, f)
+    except OSError:
+        pass  # 缓存写入失败不影响使用
+    return selected_voice.voice_id, selected_voice.name
+
+
+VOICE_ID, VOICE_NAME = load_voice()
+print(f"使用语音: {VOICE_NAME} (ID: {VOICE_ID})")
 
 # TTS配置
 TTS_MODEL_ID = "eleven_turbo_v2_5"  # 快速、低延迟模型
-TTS_OUTPUT_FORMAT = "mp3_44100_128"  # MP3格式（免费套餐兼容）
+# 默认MP3格式（免费套餐兼容）；付费套餐可设为pcm_44100等PCM格式
+TTS_OUTPUT_FORMAT = os.getenv("ELEVENLABS_OUTPUT_FORMAT", "mp3_44100_128")
+TTS_IS_PCM = TTS_OUTPUT_FORMAT.startswith("pcm_")
+
+# 文本发送配置：首块立即发送，之后的文本块在以下边界处或距上次发送超过时间窗口时合并发送
+TEXT_FLUSH_INTERVAL = 0.04  # 秒
+TEXT_FLUSH_ENDINGS = (" ", "\n", ".", ",", "!", "?", "。", "，", "！", "？", "；", "：")
+
+# MP3帧同步字：11个置位比特（0xFF后接高3位为1的字节）
+MP3_SYNC_RE = re.compile(rb"\xff[\xe0-\xff]")
+# Layer III比特率表（kbps），按MPEG1与MPEG2/2.5区分，索引0和15无效
+MP3_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 0),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, 0),
+}
+# 采样率表，键为帧头中的版本位：3=MPEG1，2=MPEG2，0=MPEG2.5
+MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def mp3_frame_length(buf, pos):
+    """解析pos处的4字节MP3（Layer III）帧头并返回整帧字节数。
+
+    Args:
+        buf: 包含帧头的字节缓冲区
+        pos: 帧同步字所在位置
+
+    Returns:
+        int或None: 帧长度；帧头无效或不完整时返回None
+    """
+    if len(buf) - pos < 4:
+        return None
+    version = (buf[pos + 1] >> 3) & 0x03
+    layer = (buf[pos + 1] >> 1) & 0x03
+    bitrate_index = buf[pos + 2] >> 4
+    rate_index = (buf[pos + 2] >> 2) & 0x03
+    padding = (buf[pos + 2] >> 1) & 0x01
+    if version == 1 or layer != 1 or rate_index == 3:
+        return None
+    bitrate = MP3_BITRATES[1 if version == 3 else 2][bitrate_index] * 1000
+    if not bitrate:
+        return None
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    # MPEG1每帧1152个样本，MPEG2/2.5每帧576个样本
+    return (144 if version == 3 else 72) * bitrate // sample_rate + padding
 
 
 class AudioQueue:
     """管理连续音频播放，最小化延迟。
 
     使用sounddevice OutputStream与基于回调的流式传输：
-    - 维护一个字节缓冲区用于传入音频块
-    - 流式回调实时从缓冲区读取
+    - 维护一个预分配的int16环形缓冲区用于传入音频块，以int16直接送入输出流，无需浮点转换
+    - 流式回调实时从缓冲区复制到输出，回调中不分配内存
     - 预缓冲防止缓冲区下溢导致的爆音
     """
     # 音频缓冲区配置常量
-    PRE_BUFFER_SIZE = 8192  # 播放开始前的最小缓冲区大小（防止初始爆音）
-    BUFFER_CLEANUP_THRESHOLD = 100000  # 缓冲区清理前的字节数，防止内存增长
-    REMAINING_BYTES_THRESHOLD = 1000  # 考虑播放有效完成的字节数
+    PRE_BUFFER_SIZE = 4096  # 播放开始前的最小缓冲区字节数（防止初始爆音）
+    REMAINING_BYTES_THRESHOLD = 500  # 考虑播放有效完成的字节数
+    SAMPLE_WIDTH = 2  # 每个int16样本的字节数
+    RING_SECONDS = 4  # 环形缓冲区初始容量（秒），写满时由写入线程扩容
+    BLOCK_SIZE = 2048  # 每次回调填充的帧数
 
     def __init__(self):
-        self.buffer = bytearray()
+        self.ring = None  # 环形缓冲区，形状为(帧数, 通道数)，首次写入时按通道数分配
+        self.read_index = 0  # 下一个待播放帧在环形缓冲区中的位置
+        self.buffered_frames = 0  # 尚未播放的帧数
         self.buffer_lock = threading.Lock()
         self.playing = False
         self.stream = None
@@ -100,45 +186,150 @@ class AudioQueue:
         self.sample_rate = 44100
         self.channels = 2
         self.finished = False
-        self.read_position = 0
+        self.drained = threading.Event()  # 全部音频送入输出流后置位
+        self.pcm_remainder = b''
+        self.mp3_residual = bytearray()  # 尚未组成完整MP3帧的字节
+
+        if TTS_IS_PCM:
+            # PCM格式为单声道16位小端样本，采样率由格式名给出（如pcm_44100）
+            self.sample_rate = int(TTS_OUTPUT_FORMAT.split("_")[1])
+            self.channels = 1
 
     def add(self, audio_data):
-        """将MP3音频块添加到播放缓冲区。
+        """将音频块添加到播放缓冲区。
 
         Args:
-            audio_data: 原始MP3音频字节
+            audio_data: 原始音频字节（MP3或PCM，取决于TTS_OUTPUT_FORMAT）
         """
+        if TTS_IS_PCM:
+            self.add_pcm(audio_data)
+            return
+
+        # WebSocket块边界不与MP3帧对齐：累积数据，只解码完整的帧，不完整的尾部留到下一块
+        self.mp3_residual += audio_data
+        frames = self.take_mp3_frames()
+        if not frames:
+            return
+
         try:
             # 将MP3解码为PCM
-            audio_segment = AudioSegment.from_mp3(io.BytesIO(audio_data))
+            audio_segment = AudioSegment.from_mp3(io.BytesIO(frames))
+        except CouldntDecodeError:
+            # 完整帧仍无法解码说明数据已损坏，跳过该段
+            return
 
-            # 转换为numpy数组
-            samples = np.array(audio_segment.get_array_of_samples(), dtype=np.int16)
-            samples = samples.astype(np.float32) / 32768.0
+        # 解码结果统一为16位样本，直接作为int16数组使用
+        if audio_segment.sample_width != self.SAMPLE_WIDTH:
+            audio_segment = audio_segment.set_sample_width(self.SAMPLE_WIDTH)
+        samples = np.frombuffer(audio_segment.raw_data, dtype=np.int16)
 
-            if not self.playing:
-                self.sample_rate = audio_segment.frame_rate
-                self.channels = audio_segment.channels
+        if not self.playing:
+            self.sample_rate = audio_segment.frame_rate
+            self.channels = audio_segment.channels
 
-            # 根据通道数重新整形
-            if self.channels > 1:
-                samples = samples.reshape((-1, self.channels))
-            else:
-                samples = samples.reshape((-1, 1))
+        self.enqueue(samples)
 
-            with self.buffer_lock:
-                self.buffer.extend(samples.tobytes())
-
-            # 预缓冲后开始播放
-            if not self.playing and len(self.buffer) >= self.PRE_BUFFER_SIZE:
-                self.start_playback()
-        except:
-            # 静默跳过无法解码的无效MP3块
-            # 这在实时流式传输MP3数据时很常见，因为块可能包含
-            # 不完整的帧。跳过这些可以防止控制台错误，但可能导致
-            # 短暂的音频爆音。要消除爆音，升级到付费ElevenLabs套餐
-            # 并使用pcm_44100格式而不是MP3。
-            pass
+    def take_mp3_frames(self):
+        """从累积缓冲区取出所有完整的MP3帧。
+
+        通过帧同步字定位帧头并按帧头计算帧长，帧之间无需再搜索。帧头之前无法识别的字节
+        被丢弃，最后一个不完整的帧保留在缓冲区中。
+
+        Returns:
+            bytes: 连续的完整帧数据（可能为空）
+        """
+        buf = self.mp3_residual
+        start = None  # 第一个完整帧的起点
+        end = 0  # 最后一个完整帧的终点
+        keep = len(buf)  # 需保留的尾部起点
+        pos = 0
+        while True:
+            match = MP3_SYNC_RE.search(buf, pos)
+            if match is None:
+                # 末尾的0xFF可能是被切断的同步字前半部分
+                keep = len(buf) - 1 if buf.endswith(b"\xff") else len(buf)
+                break
+            pos = match.start()
+            length = mp3_frame_length(buf, pos)
+            if length is None:
+                if len(buf) - pos < 4:
+                    keep = pos  # 帧头本身尚未收全
+                    break
+                pos += 1  # 伪同步字，继续向后搜索
+                continue
+            if pos + length > len(buf):
+                keep = pos  # 帧体尚未收全
+                break
+            if start is None:
+                start = pos
+            end = pos = pos + length
+
+        frames = bytes(buf[start:end]) if start is not None else b""
+        del buf[:max(keep, end)]
+        return frames
+
+    def add_pcm(self, audio_data):
+        """将16位PCM音频块直接添加到播放缓冲区，无需解码。
+
+        Args:
+            audio_data: 原始16位小端PCM字节
+        """
+        # 块边界可能落在样本中间，将多出的奇数字节留给下一块
+        data = self.pcm_remainder + audio_data
+        usable = len(data) - len(data) % 2
+        self.pcm_remainder = data[usable:]
+
+        self.enqueue(np.frombuffer(data, dtype="<i2", count=usable // 2))
+
+    def enqueue(self, samples):
+        """将int16样本写入播放缓冲区，并在预缓冲足够后开始播放。
+
+        Args:
+            samples: int16样本（多声道时为交错排列）
+        """
+        # 多声道样本按帧整形；单声道样本已是一维，直接写入环形缓冲区的唯一一列
+        if self.channels > 1:
+            samples = samples.reshape((-1, self.channels))
+
+        count = len(samples)
+        with self.buffer_lock:
+            if self.ring is None:
+                self.ring = np.zeros(
+                    (self.sample_rate * self.RING_SECONDS, self.channels), dtype=np.int16
+                )
+            if self.buffered_frames + count > len(self.ring):
+                self.grow_ring(self.buffered_frames + count)
+            ring = self.ring if self.channels > 1 else self.ring[:, 0]
+
+            # 写入位置紧跟在未播放数据之后，越过末尾时分两段复制
+            capacity = len(ring)
+            start = (self.read_index + self.buffered_frames) % capacity
+            first = min(count, capacity - start)
+            np.copyto(ring[start:start + first], samples[:first])
+            np.copyto(ring[:count - first], samples[first:])
+            self.buffered_frames += count
+
+        # 预缓冲后开始播放
+        buffered_bytes = self.buffered_frames * self.channels * self.SAMPLE_WIDTH
+        if not self.playing and buffered_bytes >= self.PRE_BUFFER_SIZE:
+            self.start_playback()
+
+    def grow_ring(self, min_frames):
+        """扩容环形缓冲区并把未播放数据移到开头（调用方须持有buffer_lock）。
+
+        TTS生成通常快于实时播放，长回复可能超出初始容量；扩容只发生在写入线程，
+        播放回调中始终不分配内存。
+
+        Args:
+            min_frames: 扩容后至少需要容纳的帧数
+        """
+        capacity = len(self.ring)
+        ring = np.zeros((max(capacity * 2, min_frames), self.channels), dtype=np.int16)
+        first = min(self.buffered_frames, capacity - self.read_index)
+        ring[:first] = self.ring[self.read_index:self.read_index + first]
+        ring[first:self.buffered_frames] = self.ring[:self.buffered_frames - first]
+        self.ring = ring
+        self.read_index = 0
 
     def start_playback(self):
         """启动音频输出流。"""
@@ -150,56 +341,55 @@ class AudioQueue:
                 self.first_audio_time = time.time()
                 self.first_audio_played = True
 
-            bytes_needed = frames * self.channels * 4
-
             with self.buffer_lock:
-                bytes_available = len(self.buffer) - self.read_position
-                bytes_to_read = min(bytes_needed, bytes_available)
-
-                if bytes_to_read > 0:
-                    data = bytes(self.buffer[self.read_position:self.read_position + bytes_to_read])
-                    self.read_position += bytes_to_read
-
-                    if self.read_position > self.BUFFER_CLEANUP_THRESHOLD:
-                        self.buffer = self.buffer[self.read_position:]
-                        self.read_position = 0
-                else:
-                    data = b''
-
-            if len(data) > 0:
-                audio_array = np.frombuffer(data, dtype=np.float32)
-                audio_array = audio_array.reshape((-1, self.channels))
-
-                samples_to_write = min(len(audio_array), frames)
-                if samples_to_write > 0:
-                    outdata[:samples_to_write] = audio_array[:samples_to_write]
-                if samples_to_write < frames:
-                    outdata[samples_to_write:] = 0
-            else:
-                outdata[:] = 0
+                count = min(frames, self.buffered_frames)
+                if count > 0:
+                    # 读取越过环形缓冲区末尾时分两段复制
+                    capacity = len(self.ring)
+                    first = min(count, capacity - self.read_index)
+                    np.copyto(outdata[:first], self.ring[self.read_index:self.read_index + first])
+                    np.copyto(outdata[first:count], self.ring[:count - first])
+                    self.read_index = (self.read_index + count) % capacity
+                    self.buffered_frames -= count
+
+            if count < frames:
+                outdata[count:].fill(0)
+
+            self.check_drained()
 
         self.stream = sd.OutputStream(
             samplerate=self.sample_rate,
             channels=self.channels,
             callback=callback,
-            dtype=np.float32,
-            blocksize=2048
+            dtype=np.int16,
+            blocksize=self.BLOCK_SIZE
         )
         self.stream.start()
 
 
+    def finish(self):
+        """标记不会再有新的音频块；不足预缓冲量的剩余音频也立即开始播放。"""
+        self.finished = True
+        if not self.playing and self.buffered_frames > 0:
+            self.start_playback()
+        self.check_drained()
+
+    def check_drained(self):
+        """在音频流结束且缓冲区基本播放完时置位drained事件。"""
+        if not self.finished:
+            return
+        with self.buffer_lock:
+            remaining = self.buffered_frames * self.channels * self.SAMPLE_WIDTH
+        if remaining < self.REMAINING_BYTES_THRESHOLD:
+            self.drained.set()
+
     def wait_until_done(self):
         """阻塞直到所有缓冲音频播放完成。"""
-        while True:
-            with self.buffer_lock:
-                remaining = len(self.buffer) - self.read_position
-            if remaining < self.REMAINING_BYTES_THRESHOLD:
-                break
-            time.sleep(0.1)
-
-        time.sleep(0.5)
+        self.drained.wait()
 
         if self.stream:
+            # 最后一个回调块仍在设备缓冲中：等待输出延迟加一个块的时长后再停止
+            time.sleep(self.stream.latency + self.BLOCK_SIZE / self.sample_rate)
             self.stream.stop()
             self.stream.close()
         self.playing = False
@@ -213,11 +403,22 @@ def record_audio():
     """
     input("按Enter键开始录音...")
     print("录音中... 按Enter键停止。")
-    recording = []
+    recording = np.empty((SAMPLE_RATE * RECORD_BUFFER_SECONDS, CHANNELS), dtype=np.int16)
+    recorded = 0
 
     def callback(indata, _frames, _time_info, _status):
-        """回调函数，将音频块追加到录音列表中。"""
-        recording.append(indata.copy())
+        """回调函数，将音频块直接转换为int16写入预分配的录音缓冲区。"""
+        nonlocal recording, recorded
+        end = recorded + len(indata)
+        if end > len(recording):
+            # 录音超出预分配时长时倍增扩容
+            grown = np.empty((max(len(recording) * 2, end), CHANNELS), dtype=np.int16)
+            grown[:recorded] = recording[:recorded]
+            recording = grown
+
+        # 一步完成缩放与类型转换，不保留float32副本
+        np.multiply(indata, 32767, out=recording[recorded:end], casting="unsafe")
+        recorded = end
 
     # 创建音频输入流
     stream = sd.InputStream(
@@ -232,13 +433,9 @@ def record_audio():
     stream.stop()
     stream.close()
 
-    # 将所有音频块连接为单个数组
-    audio_data = np.concatenate(recording, axis=0)
-
-    # 将float32音频转换为int16 WAV格式
+    # 写入int16 WAV格式
     audio_buffer = io.BytesIO()
-    audio_int16 = (audio_data * 32767).astype(np.int16)
-    wavfile.write(audio_buffer, SAMPLE_RATE, audio_int16)
+    wavfile.write(audio_buffer, SAMPLE_RATE, recording[:recorded])
     audio_buffer.seek(0)
 
     return audio_buffer
@@ -269,8 +466,8 @@ def transcribe_audio(audio_buffer):
 def stream_claude_and_synthesize_ws(messages, audio_queue):
     """直接将Claude响应流式传输到ElevenLabs WebSocket。
 
-    文本块立即发送到TTS，无需缓冲，
-    实现从第一个token到第一个音频的最小延迟。
+    第一个文本块立即发送到TTS并触发生成，实现从第一个token到第一个音频的最小延迟；
+    后续文本块在词/标点边界或短时间窗口内合并后发送。
 
     Args:
         messages: 对话历史记录（消息字典列表）
@@ -283,13 +480,12 @@ def stream_claude_and_synthesize_ws(messages, audio_queue):
 
     ws_url = f"wss://api.elevenlabs.io/v1/text-to-speech/{VOICE_ID}/stream-input?model_id={TTS_MODEL_ID}&output_format={TTS_OUTPUT_FORMAT}"
 
-    ws_connected = False
-    ws_finished = False
+    ws_connected = threading.Event()
+    ws_finished = threading.Event()
 
     def on_message(ws, message):
         """处理传入的WebSocket消息。"""
-        nonlocal ws_finished
-        data = json.loads(message)
+        data = json_loads(message)
 
         if "audio" in data and data["audio"]:
             audio_bytes = base64.b64decode(data["audio"])
@@ -297,7 +493,7 @@ def stream_claude_and_synthesize_ws(messages, audio_queue):
 
         # 检查生成是否完成
         if data.get("isFinal"):
-            ws_finished = True
+            ws_finished.set()
 
     def on_error(ws, error):
         print(f"\nWebSocket错误: {error}")
@@ -308,9 +504,6 @@ def stream_claude_and_synthesize_ws(messages, audio_queue):
             print(f"\nWebSocket关闭，状态码: {close_status_code}: {close_msg}")
 
     def on_open(ws):
-        nonlocal ws_connected
-        ws_connected = True
-
         initial_message = {
             "text": " ",
             "voice_settings": {
@@ -319,7 +512,8 @@ def stream_claude_and_synthesize_ws(messages, audio_queue):
             },
             "xi_api_key": ELEVENLABS_API_KEY
         }
-        ws.send(json.dumps(initial_message))
+        ws.send(json_dumps(initial_message))
+        ws_connected.set()
 
     ws = websocket.WebSocketApp(
         ws_url,
@@ -333,12 +527,25 @@ def stream_claude_and_synthesize_ws(messages, audio_queue):
     ws_thread.daemon = True
     ws_thread.start()
 
-    while not ws_connected:
-        time.sleep(0.01)
+    ws_connected.wait()
 
     response_text = ""
-
-    # 流式传输Claude响应并将每个块发送到WebSocket
+    pending = []  # 尚未发送的文本块
+    first_sent = False
+    last_flush = time.monotonic()
+
+    def flush():
+        """将合并的文本块作为一帧发送，仅首帧请求立即触发生成。"""
+        nonlocal first_sent, last_flush
+        ws.send(json_dumps({
+            "text": "".join(pending),
+            "try_trigger_generation": not first_sent
+        }))
+        pending.clear()
+        first_sent = True
+        last_flush = time.monotonic()
+
+    # 流式传输Claude响应并将文本块合并发送到WebSocket
     with anthropic_client.messages.stream(
         model="claude-haiku-4-5",
         max_tokens=1000,
@@ -350,16 +557,21 @@ def stream_claude_and_synthesize_ws(messages, audio_queue):
         for text in stream.text_stream:
             print(text, end="", flush=True)
             response_text += text
-            ws.send(json.dumps({
-                "text": text,
-                "try_trigger_generation": True
-            }))
-
-    ws.send(json.dumps({"text": ""}))
+            pending.append(text)
+            if (
+                not first_sent
+                or text.endswith(TEXT_FLUSH_ENDINGS)
+                or time.monotonic() - last_flush > TEXT_FLUSH_INTERVAL
+            ):
+                flush()
+
+    if pending:
+        flush()
+    ws.send(json_dumps({"text": ""}))
 
     # 等待WebSocket发出完成信号
-    while not ws_finished:
-        time.sleep(0.1)
+    ws_finished.wait(timeout=30)
+    audio_queue.finish()
 
     ws.close()
     ws_thread.join(timeout=2)
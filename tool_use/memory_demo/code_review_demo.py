@@ -6,15 +6,25 @@
 2. 会话 2：Claude 应用学习到的模式（更快！）
 3. 会话 3：带有上下文编辑的长会话
 
+会话 1 完成后，会话 2 和会话 3 通过 AsyncAnthropic 并发运行。
+
 需要：
 - 包含 ANTHROPIC_API_KEY 和 ANTHROPIC_MODEL 的 .env 文件
 - 同目录下的 memory_tool.py 文件
 """
 
+import argparse
+import asyncio
+import dataclasses
+import functools
+import hashlib
+import json
 import os
-from typing import Any, Dict, List
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
-from anthropic import Anthropic
+from anthropic import APIError, AsyncAnthropic
 from dotenv import load_dotenv
 
 import sys
@@ -23,6 +33,7 @@ from pathlib import Path
 # 添加父目录到路径以导入 memory_tool
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from demo_helpers import BETAS, MEMORY_TOOLS, ContextEditInfo, edits_from_dict, run_tool
 from memory_tool import MemoryToolHandler
 
 
@@ -51,6 +62,55 @@ CONTEXT_MANAGEMENT = {
     ]
 }
 
+# 客户端清除工具结果时保留的最近工具使用次数（与服务器端 keep 配置一致）及占位文本
+KEEP_TOOL_USES = CONTEXT_MANAGEMENT["edits"][0]["keep"]["value"]
+CLEARED_TOOL_RESULT = "[工具结果已清除]"
+
+# 批量审查结果中每个文件的审查块
+REVIEW_BLOCK_RE = re.compile(r'<review file="([^"]+)">(.*?)</review>', re.DOTALL)
+
+# 单个待审查文件允许的最大输入令牌数，超出时在调用 Messages API 前直接跳过
+MAX_CODE_TOKENS = 50000
+
+# 代码 -> 令牌数，同一段代码只计数一次
+_TOKEN_COUNTS: Dict[str, int] = {}
+
+# 示例代码目录及各会话审查的示例文件
+SAMPLE_CODE_DIR = Path(__file__).parent / "sample_code"
+SAMPLE_FILES = ("web_scraper_v1.py", "api_client_v1.py", "data_processor_v1.py")
+
+# 所有会话共享的客户端和记忆处理器：复用同一连接池，避免每个会话重新建立 TLS 连接
+_CLIENT = AsyncAnthropic(api_key=API_KEY, max_retries=2, timeout=60.0)
+_MEMORY = MemoryToolHandler(base_path="./memory_storage")
+
+
+class ReviewCache:
+    """
+    以内容哈希为键的审查结果缓存。
+
+    每条结果保存为缓存目录下的一个 JSON 文件，重复运行演示时相同的审查无需再次调用 API。
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """返回缓存的审查结果；未命中或缓存文件损坏时返回 None。"""
+        try:
+            data = json.loads((self.cache_dir / f"{key}.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        data["context_edits"] = [ContextEditInfo(**edit) for edit in data["context_edits"]]
+        return data
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        """保存审查结果。"""
+        data = {**result, "context_edits": [dataclasses.asdict(e) for e in result["context_edits"]]}
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        (self.cache_dir / f"{key}.json").write_text(
+            json.dumps(data, ensure_ascii=False), encoding="utf-8"
+        )
+
 
 class CodeReviewAssistant:
     """
@@ -62,16 +122,45 @@ class CodeReviewAssistant:
     - 当上下文过大时自动清除旧工具结果
     """
 
-    def __init__(self, memory_storage_path: str = "./memory_storage"):
+    def __init__(
+        self,
+        memory_storage_path: str = "./memory_storage",
+        stream_output: bool = False,
+        memory_handler: Optional[MemoryToolHandler] = None,
+    ):
         """
         初始化代码审查助手。
 
         Args:
-            memory_storage_path: 记忆存储路径
+            memory_storage_path: 记忆存储路径（未传入 memory_handler 时使用）
+            stream_output: 是否在生成过程中实时打印 Claude 的文本（并发运行多个会话时应关闭）
+            memory_handler: 可选的共享记忆处理器
         """
-        self.client = Anthropic(api_key=API_KEY)
-        self.memory_handler = MemoryToolHandler(base_path=memory_storage_path)
+        self.stream_output = stream_output
+        self.client = _CLIENT
+        self.memory_handler = memory_handler or MemoryToolHandler(base_path=memory_storage_path)
         self.messages: List[Dict[str, Any]] = []
+        self.review_cache = ReviewCache(self.memory_handler.base_path / ".review_cache")
+        system_prompt = self._create_system_prompt()
+        self._system_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+        # 除消息外的请求参数在各轮次间保持不变，只构建一次；
+        # 系统提示末尾设置缓存断点以复用提示缓存
+        self.request_params: Dict[str, Any] = {
+            "model": MODEL,
+            "max_tokens": 4096,
+            # 固定温度，使缓存的审查结果与重新请求的结果可比
+            "temperature": 0,
+            "system": [
+                {
+                    "type": "text",
+                    "text": system_prompt,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ],
+            "tools": MEMORY_TOOLS,
+            "betas": BETAS,
+            "context_management": CONTEXT_MANAGEMENT,
+        }
 
     def _create_system_prompt(self) -> str:
         """创建带有记忆指令的系统提示。"""
@@ -90,14 +179,47 @@ class CodeReviewAssistant:
 
 记住：您的记忆在对话之间持续存在。明智地使用它。"""
 
-    def _execute_tool_use(self, tool_use: Any) -> str:
-        """执行工具使用并返回结果。"""
-        if tool_use.name == "memory":
-            result = self.memory_handler.execute(**tool_use.input)
-            return result.get("success") or result.get("error", "未知错误")
-        return f"未知工具: {tool_use.name}"
+    def _execute_tool_use(self, tool_use: Dict[str, Any]) -> str:
+        """执行工具使用块（字典形式）并返回结果。"""
+        return run_tool(tool_use["name"], tool_use["input"], self.memory_handler)
 
-    def review_code(self, code: str, filename: str, description: str = "") -> Dict[str, Any]:
+    async def _token_budget(self, code: str) -> Optional[int]:
+        """
+        返回代码的输入令牌数；结果按代码内容缓存，每段代码只调用一次令牌计数接口。
+
+        令牌数通常远少于UTF-8字节数，字节数不超过上限的代码无需额外的网络请求，直接返回None。
+        令牌计数接口出错（限流、网络错误等）时同样返回None，不因预检失败而中止审查。
+        """
+        if len(code.encode("utf-8")) <= MAX_CODE_TOKENS:
+            return None
+        if code not in _TOKEN_COUNTS:
+            try:
+                count = await self.client.beta.messages.count_tokens(
+                    model=MODEL, messages=[{"role": "user", "content": code}]
+                )
+            except APIError as e:
+                print(f"  ⚠️ 令牌计数失败，跳过大小检查: {e}")
+                return None
+            _TOKEN_COUNTS[code] = count.input_tokens
+        return _TOKEN_COUNTS[code]
+
+    def _memory_fingerprint(self) -> str:
+        """记忆目录内容的哈希；记忆变化后，之前缓存的审查不再命中。"""
+        digest = hashlib.sha256()
+        memory_root = self.memory_handler.memory_root
+        for path in sorted(memory_root.rglob("*")):
+            if path.is_file():
+                digest.update(path.relative_to(memory_root).as_posix().encode("utf-8") + b"\0")
+                digest.update(path.read_bytes() + b"\0")
+        return digest.hexdigest()
+
+    def _review_cache_key(self, code: str, filename: str, description: str) -> str:
+        parts = [MODEL, self._system_hash, self._memory_fingerprint(), filename, description, code]
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+    async def review_code(
+        self, code: str, filename: str, description: str = ""
+    ) -> Dict[str, Any]:
         """
         使用记忆增强分析审查代码。
 
@@ -109,77 +231,188 @@ class CodeReviewAssistant:
         Returns:
             包含审查结果和元数据的字典
         """
-        # 构建用户消息
-        user_message = f"请审查来自 {filename} 的这段代码"
+        # 构建用户消息：代码块在前并设置缓存断点，同一文件再次审查时可复用提示缓存；
+        # 描述放在断点之后，不影响缓存前缀
+        user_content = [
+            {
+                "type": "text",
+                "text": f"请审查来自 {filename} 的这段代码\n\n```python\n{code}\n```",
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
         if description:
-            user_message += f"\n\n上下文: {description}"
-        user_message += f"\n\n```python\n{code}\n```"
+            user_content.append({"type": "text", "text": f"上下文: {description}"})
+
+        # 只缓存新对话中的审查：已有对话历史时结果还依赖于之前的消息
+        cache_key = None
+        if not self.messages:
+            cache_key = self._review_cache_key(code, filename, description)
+            cached = self.review_cache.get(cache_key)
+            if cached is not None:
+                print(f"  💾 [{filename}] 命中审查缓存，跳过 API 调用")
+                if self.stream_output:
+                    print(cached["review"])
+                self._append_user_content(user_content)
+                self.messages.append(
+                    {"role": "assistant", "content": [{"type": "text", "text": cached["review"]}]}
+                )
+                return cached
+
+        # 先估算代码的令牌数，过大的输入不再发起完整的审查请求
+        code_tokens = await self._token_budget(code)
+        if code_tokens is not None and code_tokens > MAX_CODE_TOKENS:
+            reason = f"{filename} 约 {code_tokens:,} 个令牌，超过上限 {MAX_CODE_TOKENS:,}"
+            print(f"  ⚠️ 跳过审查: {reason}")
+            return {
+                "review": f"已跳过: {reason}",
+                "input_tokens": 0,
+                "context_edits": [],
+            }
+
+        self._append_user_content(user_content)
+        result = await self._run_conversation(filename)
+        if cache_key is not None:
+            self.review_cache.set(cache_key, result)
+        return result
+
+    async def review_codes_batch(self, items: List[Tuple[str, str, str]]) -> Dict[str, Any]:
+        """
+        在同一个请求中审查多个互不依赖的文件。
+
+        系统提示、工具定义和对话只发送一次，Claude 为每个文件输出一个
+        <review file="..."> 块，结果按文件名拆分。
+
+        Args:
+            items: (代码, 文件名, 描述) 元组列表
+
+        Returns:
+            包含审查结果和元数据的字典，其中 reviews 为 文件名 -> 审查文本
+        """
+        total = len(items)
+        user_content = [
+            {
+                "type": "text",
+                "text": f"请分别审查以下 {total} 个文件。对每个文件输出一个"
+                '<review file="文件名">...</review> 块，块内为该文件的完整审查。',
+            }
+        ]
+        for index, (code, filename, description) in enumerate(items, 1):
+            text = f"文件 {index}/{total} ({filename}):\n\n```python\n{code}\n```"
+            if description:
+                text += f"\n\n上下文: {description}"
+            user_content.append({"type": "text", "text": text})
+        # 缓存断点放在最后一个文件之后，覆盖整批代码
+        user_content[-1]["cache_control"] = {"type": "ephemeral"}
+
+        self._append_user_content(user_content)
+        result = await self._run_conversation(f"{total} 个文件")
+        result["reviews"] = {
+            match.group(1): match.group(2).strip()
+            for match in REVIEW_BLOCK_RE.finditer(result["review"])
+        }
+        return result
+
+    def _append_user_content(self, user_content: List[Dict[str, Any]]) -> None:
+        """添加新的用户消息；每个请求的缓存断点数量有限，只保留最新一条消息的断点。"""
+        for message in self.messages:
+            if message["role"] == "user" and isinstance(message["content"], list):
+                for block in message["content"]:
+                    block.pop("cache_control", None)
 
-        self.messages.append({"role": "user", "content": user_message})
+        self.messages.append({"role": "user", "content": user_content})
+
+    async def _run_conversation(self, label: str) -> Dict[str, Any]:
+        """
+        运行对话循环直到 Claude 不再使用工具。
+
+        Args:
+            label: 进度输出中标识本次审查的名称
 
+        Returns:
+            包含审查文本、输入令牌数和上下文编辑的字典
+        """
         # 跟踪令牌使用情况和上下文管理
         total_input_tokens = 0
-        context_edits_applied = []
+        context_edits_applied: List[ContextEditInfo] = []
 
         # 对话循环
         turn = 1
         while True:
-            print(f"  🔄 轮次 {turn}: 正在调用 Claude API...", end="", flush=True)
-            response = self.client.beta.messages.create(
-                model=MODEL,
-                max_tokens=4096,
-                system=self._create_system_prompt(),
-                messages=self.messages,
-                tools=[{"type": "memory_20250818", "name": "memory"}],
-                betas=["context-management-2025-06-27"],
-                context_management=CONTEXT_MANAGEMENT,
-            )
-
-            print(" ✓")
+            # 多个会话可能并发运行，每行输出都带上文件名并完整打印
+            print(f"  🔄 [{label}] 轮次 {turn}: 正在调用 Claude API...")
+            # 流式接收响应，文本生成的同时即可显示；最终消息用于读取使用情况和上下文管理
+            async with self.client.beta.messages.stream(
+                messages=self.messages, **self.request_params
+            ) as stream:
+                if self.stream_output:
+                    streamed = False
+                    async for event in stream:
+                        if event.type == "text":
+                            print(event.text, end="", flush=True)
+                            streamed = True
+                    if streamed:
+                        print()
+                response = await stream.get_final_message()
+
+            # 每轮只把响应转成一次普通字典，之后的读取都不再经过模型属性访问
+            data = response.model_dump()
 
             # 跟踪使用情况
-            total_input_tokens = response.usage.input_tokens
+            total_input_tokens = data["usage"]["input_tokens"]
 
             # 检查上下文管理
-            if hasattr(response, "context_management") and response.context_management:
-                applied = getattr(response.context_management, "applied_edits", [])
-                if applied:
-                    context_edits_applied.extend(applied)
+            applied = edits_from_dict(data.get("context_management") or {})
+            if applied:
+                context_edits_applied.extend(applied)
+                # 服务器已清除旧的工具结果：本地同步清除，后续请求不再发送这些内容
+                _compact_messages(self.messages)
+
+            # 没有请求工具调用（通常是最后一轮）：只收集文本，跳过工具处理
+            if data["stop_reason"] != "tool_use":
+                final_text = [block["text"] for block in data["content"] if block["type"] == "text"]
+                text_content = [{"type": "text", "text": text} for text in final_text]
+                self.messages.append({"role": "assistant", "content": text_content})
+                break
 
             # 处理响应内容
             assistant_content = []
             tool_results = []
             final_text = []
-
-            for content in response.content:
-                if content.type == "text":
-                    assistant_content.append({"type": "text", "text": content.text})
-                    final_text.append(content.text)
-                elif content.type == "tool_use":
-                    cmd = content.input.get("command", "unknown")
-                    path = content.input.get("path", "")
-                    print(f"    🔧 记忆: {cmd} {path}")
+            # 本轮的工具调用记录先收集起来，处理完后一次性输出
+            tool_log = []
+
+            for block in data["content"]:
+                if block["type"] == "text":
+                    assistant_content.append({"type": "text", "text": block["text"]})
+                    final_text.append(block["text"])
+                elif block["type"] == "tool_use":
+                    cmd = block["input"].get("command", "unknown")
+                    path = block["input"].get("path", "")
+                    tool_log.append(f"    🔧 [{label}] 记忆: {cmd} {path}")
 
                     # 执行工具
-                    result = self._execute_tool_use(content)
+                    result = self._execute_tool_use(block)
 
                     assistant_content.append(
                         {
                             "type": "tool_use",
-                            "id": content.id,
-                            "name": content.name,
-                            "input": content.input,
+                            "id": block["id"],
+                            "name": block["name"],
+                            "input": block["input"],
                         }
                     )
 
                     tool_results.append(
                         {
                             "type": "tool_result",
-                            "tool_use_id": content.id,
+                            "tool_use_id": block["id"],
                             "content": result,
                         }
                     )
 
+            if tool_log:
+                print("\n".join(tool_log))
+
             # 添加助手消息
             self.messages.append({"role": "assistant", "content": assistant_content})
 
@@ -189,7 +422,6 @@ class CodeReviewAssistant:
                 turn += 1
             else:
                 # 没有更多工具使用，完成
-                print()
                 break
 
         return {
@@ -203,30 +435,73 @@ class CodeReviewAssistant:
         self.messages = []
 
 
-def run_session_1() -> None:
+def _compact_messages(messages: List[Dict[str, Any]], keep_tool_uses: int = KEEP_TOOL_USES) -> int:
+    """
+    将最近 keep_tool_uses 次之前的工具结果替换为占位文本（就地修改）。
+
+    与服务器端 clear_tool_uses 策略保持一致：工具使用块保留，只清除结果内容。
+
+    Args:
+        messages: 对话消息列表
+        keep_tool_uses: 保留完整结果的最近工具使用次数
+
+    Returns:
+        本次清除的工具结果数量
+    """
+    kept = 0
+    cleared = 0
+    for message in reversed(messages):
+        if message["role"] != "user" or not isinstance(message["content"], list):
+            continue
+        for block in reversed(message["content"]):
+            if block.get("type") != "tool_result":
+                continue
+            if kept < keep_tool_uses:
+                kept += 1
+            elif block["content"] != CLEARED_TOOL_RESULT:
+                block["content"] = CLEARED_TOOL_RESULT
+                cleared += 1
+            else:
+                # 之前的压缩已清除此处及更早的全部结果，无需继续向前扫描
+                return cleared
+    return cleared
+
+
+@functools.lru_cache(maxsize=None)
+def _load_sample(filename: str) -> str:
+    """读取 sample_code 目录中的示例代码（每个文件只读取一次）。"""
+    return (SAMPLE_CODE_DIR / filename).read_text(encoding="utf-8")
+
+
+def _preload_samples() -> None:
+    """并发读取所有会话的示例文件，之后的 _load_sample 调用直接命中缓存。"""
+    with ThreadPoolExecutor(max_workers=len(SAMPLE_FILES)) as executor:
+        list(executor.map(_load_sample, SAMPLE_FILES))
+
+
+async def run_session_1() -> None:
     """会话 1：学习调试模式。"""
     print("=" * 80)
     print("会话 1：从第一次代码审查中学习")
     print("=" * 80)
 
-    assistant = CodeReviewAssistant()
+    # 会话 1 单独运行，审查文本在生成时直接流式输出
+    assistant = CodeReviewAssistant(stream_output=True, memory_handler=_MEMORY)
 
     # 读取示例代码
-    with open("memory_demo/sample_code/web_scraper_v1.py", "r") as f:
-        code = f.read()
+    code = _load_sample("web_scraper_v1.py")
 
     print("\n📋 正在审查 web_scraper_v1.py...")
     print("\n有时会丢失结果的多线程网络爬虫。\n")
+    print("🤖 Claude 的审查:\n")
 
-    result = assistant.review_code(
+    result = await assistant.review_code(
         code=code,
         filename="web_scraper_v1.py",
         description="此爬虫有时返回的结果比预期少。"
         "计数在不同的运行中不一致。您能找到问题吗？",
     )
 
-    print("\n🤖 Claude 的审查:\n")
-    print(result["review"])
     print(f"\n📊 使用的输入令牌: {result['input_tokens']:,}")
 
     if result["context_edits"]:
@@ -235,23 +510,22 @@ def run_session_1() -> None:
     print("\n✅ 会话 1 完成 - Claude 学到了调试模式！\n")
 
 
-def run_session_2() -> None:
+async def run_session_2() -> None:
     """会话 2：应用学习到的模式。"""
     print("=" * 80)
     print("会话 2：应用学习到的模式（新对话）")
     print("=" * 80)
 
     # 新的助手实例（新对话，但记忆持续）
-    assistant = CodeReviewAssistant()
+    assistant = CodeReviewAssistant(memory_handler=_MEMORY)
 
     # 读取具有类似错误的不同示例代码
-    with open("memory_demo/sample_code/api_client_v1.py", "r") as f:
-        code = f.read()
+    code = _load_sample("api_client_v1.py")
 
     print("\n📋 正在审查 api_client_v1.py...")
     print("\n带有并发请求的异步 API 客户端。\n")
 
-    result = assistant.review_code(
+    result = await assistant.review_code(
         code=code,
         filename="api_client_v1.py",
         description="审查此异步 API 客户端。"
@@ -265,22 +539,21 @@ def run_session_2() -> None:
     print("\n✅ 会话 2 完成 - Claude 更快地应用了学习到的模式！\n")
 
 
-def run_session_3() -> None:
+async def run_session_3() -> None:
     """会话 3：带有上下文编辑的长会话。"""
     print("=" * 80)
     print("会话 3：带有上下文编辑的长会话")
     print("=" * 80)
 
-    assistant = CodeReviewAssistant()
+    assistant = CodeReviewAssistant(memory_handler=_MEMORY)
 
     # 读取数据处理代码（有多个问题）
-    with open("memory_demo/sample_code/data_processor_v1.py", "r") as f:
-        code = f.read()
+    code = _load_sample("data_processor_v1.py")
 
     print("\n📋 正在审查 data_processor_v1.py...")
     print("\n包含多个并发处理类的大文件。\n")
 
-    result = assistant.review_code(
+    result = await assistant.review_code(
         code=code,
         filename="data_processor_v1.py",
         description="此数据处理器并发处理文件。"
@@ -294,29 +567,66 @@ def run_session_3() -> None:
     if result["context_edits"]:
         print("\n🧹 应用的上下文管理:")
         for edit in result["context_edits"]:
-            print(f"  - 类型: {getattr(edit, 'type', 'unknown')}")
-            print(f"  - 清除的工具使用: {getattr(edit, 'cleared_tool_uses', 0)}")
-            print(f"  - 保存的令牌: {getattr(edit, 'cleared_input_tokens', 0):,}")
+            print(f"  - 类型: {edit.type}")
+            print(f"  - 清除的工具使用: {edit.cleared_tool_uses}")
+            print(f"  - 保存的令牌: {edit.cleared_input_tokens:,}")
 
     print("\n✅ 会话 3 完成 - 上下文编辑保持了对话的可管理性！\n")
 
 
-def main() -> None:
-    """运行所有三个演示会话。"""
+SESSIONS = {1: run_session_1, 2: run_session_2, 3: run_session_3}
+
+
+async def _run_sessions(interactive: bool = True, only_session: Optional[int] = None) -> None:
+    """
+    运行演示会话：默认依次运行会话 1，再并发运行会话 2 和会话 3。
+
+    Args:
+        interactive: 是否在会话之间等待用户按 Enter 键
+        only_session: 只运行指定编号的会话
+    """
+    if only_session is not None:
+        await SESSIONS[only_session]()
+        return
+
+    if interactive:
+        input("按 Enter 键开始会话 1...")
+    await run_session_1()
+
+    # 会话 2 依赖会话 1 写入的记忆；会话 3 独立，二者并发运行以重叠网络等待
+    if interactive:
+        input("按 Enter 键并发运行会话 2 和会话 3...")
+    await asyncio.gather(run_session_2(), run_session_3())
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="代码审查助手演示")
+    parser.add_argument(
+        "--non-interactive",
+        action="store_true",
+        help="会话之间不等待按键（用于 CI 和计时运行）",
+    )
+    parser.add_argument(
+        "--only-session",
+        type=int,
+        choices=sorted(SESSIONS),
+        help="只运行指定编号的会话",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """运行演示会话。"""
+    args = _parse_args(argv)
+    _preload_samples()
+
     print("\n🚀 代码审查助手演示\n")
     print("本演示展示:")
     print("1. 会话 1：Claude 学习调试模式")
     print("2. 会话 2：Claude 应用学习到的模式（新对话）")
     print("3. 会话 3：带有上下文编辑的长会话\n")
 
-    input("按 Enter 键开始会话 1...")
-    run_session_1()
-
-    input("按 Enter 键开始会话 2...")
-    run_session_2()
-
-    input("按 Enter 键开始会话 3...")
-    run_session_3()
+    asyncio.run(_run_sessions(not args.non_interactive, args.only_session))
 
     print("=" * 80)
     print("🎉 演示完成!")
@@ -5,11 +5,76 @@
 处理工具执行和管理上下文。
 """
 
+from collections.abc import Callable
+from dataclasses import dataclass
 from typing import Any
 
 from anthropic import Anthropic
 from memory_tool import MemoryToolHandler
 
+# 记忆工具定义与所需的 beta 标志，所有请求共用
+MEMORY_TOOLS: list[dict[str, Any]] = [{"type": "memory_20250818", "name": "memory"}]
+BETAS: list[str] = ["context-management-2025-06-27"]
+
+
+@dataclass(slots=True)
+class ContextEditInfo:
+    """服务器应用的单次上下文编辑。"""
+
+    type: str
+    cleared_tool_uses: int
+    cleared_input_tokens: int
+
+
+def _dump_context_management(response: Any) -> dict[str, Any]:
+    """将响应的 context_management 一次性转为字典；未应用上下文管理时返回空字典。"""
+    context_management = getattr(response, "context_management", None)
+    return context_management.model_dump() if context_management else {}
+
+
+def edits_from_dict(data: dict[str, Any]) -> list[ContextEditInfo]:
+    """从 model_dump() 得到的 context_management 字典中取出已应用的上下文编辑。"""
+    return [
+        ContextEditInfo(
+            type=edit.get("type") or "unknown",
+            cleared_tool_uses=edit.get("cleared_tool_uses") or 0,
+            cleared_input_tokens=edit.get("cleared_input_tokens") or 0,
+        )
+        for edit in data.get("applied_edits") or []
+    ]
+
+
+def parse_edits(response: Any) -> list[ContextEditInfo]:
+    """
+    解析响应中已应用的上下文编辑。
+
+    Args:
+        response: API 响应
+
+    Returns:
+        ContextEditInfo 列表；未应用编辑时为空列表
+    """
+    return edits_from_dict(_dump_context_management(response))
+
+
+def _run_memory_tool(memory_handler: MemoryToolHandler, tool_input: dict[str, Any]) -> str:
+    result = memory_handler.execute(**tool_input)
+    return result.get("success") or result.get("error", "未知错误")
+
+
+# 工具名称 -> 执行函数；新增工具时在此注册
+TOOL_DISPATCH: dict[str, Callable[[MemoryToolHandler, dict[str, Any]], str]] = {
+    "memory": _run_memory_tool,
+}
+
+
+def run_tool(name: str, tool_input: dict[str, Any], memory_handler: MemoryToolHandler) -> str:
+    """按工具名称和输入字典执行工具，返回结果文本。"""
+    handler = TOOL_DISPATCH.get(name)
+    if handler is None:
+        return f"未知工具: {name}"
+    return handler(memory_handler, tool_input)
+
 
 def execute_tool(tool_use: Any, memory_handler: MemoryToolHandler) -> str:
     """
@@ -22,61 +87,71 @@ def execute_tool(tool_use: Any, memory_handler: MemoryToolHandler) -> str:
     Returns:
         str: 工具执行的结果
     """
-    if tool_use.name == "memory":
-        result = memory_handler.execute(**tool_use.input)
-        return result.get("success") or result.get("error", "未知错误")
-    return f"未知工具: {tool_use.name}"
+    return run_tool(tool_use.name, tool_use.input, memory_handler)
 
 
-def run_conversation_turn(
-    client: Anthropic,
+def _build_request_params(
     model: str,
     messages: list[dict[str, Any]],
-    memory_handler: MemoryToolHandler,
     system: str,
-    context_management: dict[str, Any] | None = None,
-    max_tokens: int = 1024,
-    verbose: bool = False,
-) -> tuple[Any, list[dict[str, Any]], list[dict[str, Any]]]:
+    context_management: dict[str, Any] | None,
+    max_tokens: int,
+) -> dict[str, Any]:
     """
-    运行单次对话轮次，处理工具使用。
-
-    Args:
-        client: Anthropic 客户端实例
-        model: 要使用的模型
-        messages: 当前对话消息
-        memory_handler: 记忆工具处理器实例
-        system: 系统提示
-        context_management: 可选的上下文管理配置
-        max_tokens: 响应的最大令牌数
-        verbose: 是否打印工具操作
+    构建 API 请求参数。
 
-    Returns:
-        (响应, 助手内容, 工具结果) 的元组
+    messages 以引用方式放入参数，调用方就地追加消息后可在后续轮次直接复用同一份参数。
     """
-    memory_tool: dict[str, Any] = {"type": "memory_20250818", "name": "memory"}
-
     request_params: dict[str, Any] = {
         "model": model,
         "max_tokens": max_tokens,
-        "system": system,
+        # 以结构化形式传入系统提示，并在末尾设置缓存断点，使工具定义和系统提示跨轮次命中提示缓存
+        "system": [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}],
         "messages": messages,
-        "tools": [memory_tool],
-        "betas": ["context-management-2025-06-27"],
+        "tools": MEMORY_TOOLS,
+        "betas": BETAS,
     }
 
     if context_management:
         request_params["context_management"] = context_management
 
-    response = client.beta.messages.create(**request_params)
+    return request_params
+
+
+def _run_turn(
+    client: Anthropic,
+    request_params: dict[str, Any],
+    memory_handler: MemoryToolHandler,
+    verbose: bool,
+) -> tuple[Any, list[dict[str, Any]], list[dict[str, Any]]]:
+    """使用已构建的请求参数运行单次对话轮次，返回 (响应, 助手内容, 工具结果)。"""
+    # 流式接收响应：verbose 模式下文本在生成时即打印，最终消息用于工具调用和使用情况统计
+    with client.beta.messages.stream(**request_params) as stream:
+        for event in stream:
+            if not verbose:
+                continue
+            if event.type == "content_block_start" and event.content_block.type == "text":
+                print("💬 Claude: ", end="", flush=True)
+            elif event.type == "text":
+                print(event.text, end="", flush=True)
+            elif event.type == "content_block_stop" and event.content_block.type == "text":
+                print("\n")
+        response = stream.get_final_message()
+
+    # 没有请求工具调用（通常是最后一轮）：只收集文本，跳过工具处理
+    if response.stop_reason != "tool_use":
+        text_content = [
+            {"type": "text", "text": content.text}
+            for content in response.content
+            if content.type == "text"
+        ]
+        return response, text_content, []
 
     assistant_content = []
     tool_results = []
 
     for content in response.content:
         if content.type == "text":
-            if verbose:
-                print(f"💬 Claude: {content.text}\n")
             assistant_content.append({"type": "text", "text": content.text})
         elif content.type == "tool_use":
             if verbose:
@@ -100,6 +175,36 @@ def run_conversation_turn(
     return response, assistant_content, tool_results
 
 
+def run_conversation_turn(
+    client: Anthropic,
+    model: str,
+    messages: list[dict[str, Any]],
+    memory_handler: MemoryToolHandler,
+    system: str,
+    context_management: dict[str, Any] | None = None,
+    max_tokens: int = 1024,
+    verbose: bool = False,
+) -> tuple[Any, list[dict[str, Any]], list[dict[str, Any]]]:
+    """
+    运行单次对话轮次，处理工具使用。
+
+    Args:
+        client: Anthropic 客户端实例
+        model: 要使用的模型
+        messages: 当前对话消息
+        memory_handler: 记忆工具处理器实例
+        system: 系统提示
+        context_management: 可选的上下文管理配置
+        max_tokens: 响应的最大令牌数
+        verbose: 是否打印工具操作
+
+    Returns:
+        (响应, 助手内容, 工具结果) 的元组
+    """
+    request_params = _build_request_params(model, messages, system, context_management, max_tokens)
+    return _run_turn(client, request_params, memory_handler, verbose)
+
+
 def run_conversation_loop(
     client: Anthropic,
     model: str,
@@ -130,20 +235,15 @@ def run_conversation_loop(
     """
     turn = 1
     response = None
+    # 请求参数只构建一次；messages 为同一列表的引用，就地追加后各轮次直接复用
+    request_params = _build_request_params(model, messages, system, context_management, max_tokens)
 
     while turn <= max_turns:
         if verbose:
             print(f"\n🔄 轮次 {turn}:")
 
-        response, assistant_content, tool_results = run_conversation_turn(
-            client=client,
-            model=model,
-            messages=messages,
-            memory_handler=memory_handler,
-            system=system,
-            context_management=context_management,
-            max_tokens=max_tokens,
-            verbose=verbose,
+        response, assistant_content, tool_results = _run_turn(
+            client, request_params, memory_handler, verbose
         )
 
         messages.append({"role": "assistant", "content": assistant_content})
@@ -171,23 +271,23 @@ def print_context_management_info(response: Any) -> tuple[bool, int]:
     context_cleared = False
     saved_tokens = 0
 
-    if hasattr(response, "context_management") and response.context_management:
-        edits = getattr(response.context_management, "applied_edits", [])
+    data = _dump_context_management(response)
+    if data:
+        edits = edits_from_dict(data)
         if edits:
             context_cleared = True
-            cleared_uses = getattr(edits[0], "cleared_tool_uses", 0)
-            saved_tokens = getattr(edits[0], "cleared_input_tokens", 0)
+            saved_tokens = edits[0].cleared_input_tokens
             print("  ✂️  触发了上下文编辑!")
-            print(f"      • 清除了 {cleared_uses} 次工具使用")
+            print(f"      • 清除了 {edits[0].cleared_tool_uses} 次工具使用")
             print(f"      • 节省了 {saved_tokens:,} 个令牌")
             print(f"      • 清除后: {response.usage.input_tokens:,} 个令牌")
         else:
             # 检查我们是否能看到它未触发的原因
-            skipped_edits = getattr(response.context_management, "skipped_edits", [])
+            skipped_edits = data.get("skipped_edits") or []
             if skipped_edits:
                 print("  ℹ️  跳过了上下文清除:")
                 for skip in skipped_edits:
-                    reason = getattr(skip, "reason", "unknown")
+                    reason = skip.get("reason", "unknown")
                     print(f"      • 原因: {reason}")
             else:
                 print("  ℹ️  上下文低于阈值 - 未触发清除")
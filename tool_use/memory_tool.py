@@ -4,11 +4,38 @@
 此实现提供安全的客户端记忆操作执行，包括路径验证、错误处理和全面的安全措施。
 """
 
+import codecs
+import functools
+import itertools
+import mmap
+import os
 import shutil
+import stat
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any
 
 
+# 固定内容的结果，直接返回同一个字典对象，避免每次调用重新构建（调用方只读取结果）
+_ERR_MISSING_PATH = {"error": "Missing required parameter: path"}
+_ERR_MISSING_STR_REPLACE = {"error": "Missing required parameters: path, old_str"}
+_ERR_MISSING_INSERT = {"error": "Missing required parameters: path, insert_line"}
+_ERR_MISSING_RENAME = {"error": "Missing required parameters: old_path, new_path"}
+_ERR_DELETE_ROOT = {"error": "Cannot delete the /memories directory itself"}
+_OK_CLEARED = {"success": "All memory cleared successfully"}
+
+
+def _clear_directory(path: str | os.PathLike[str]) -> None:
+    """递归删除目录中的全部内容并保留目录本身；符号链接只删除链接，不跟随。"""
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                _clear_directory(entry.path)
+                os.rmdir(entry.path)
+            else:
+                os.unlink(entry.path)
+
+
 class MemoryToolHandler:
     """
     处理Claude的记忆工具命令执行。
@@ -21,6 +48,29 @@ class MemoryToolHandler:
         memory_root: base_path内的/memories目录
     """
 
+    # Claude可见的记忆路径前缀
+    _PREFIX = "/memories"
+    _PREFIX_LEN = len(_PREFIX)
+
+    # 文件内容缓存的总大小上限（字节）
+    _VIEW_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
+    # str_replace改用mmap查找的文件大小阈值（字节），小文件映射开销大于收益
+    _MMAP_THRESHOLD = 64 * 1024
+
+    # create命令允许的文本文件扩展名
+    _ALLOWED_EXTS = frozenset({".txt", ".md", ".json", ".py", ".yaml", ".yml"})
+
+    # 命令名 -> 处理方法名
+    _DISPATCH = {
+        "view": "_view",
+        "create": "_create",
+        "str_replace": "_str_replace",
+        "insert": "_insert",
+        "delete": "_delete",
+        "rename": "_rename",
+    }
+
     def __init__(self, base_path: str = "./memory_storage"):
         """
         初始化记忆工具处理器。
@@ -31,11 +81,24 @@ class MemoryToolHandler:
         self.base_path = Path(base_path).resolve()
         self.memory_root = self.base_path / "memories"
         self.memory_root.mkdir(parents=True, exist_ok=True)
+        # memory_root在构造后固定不变，只解析一次
+        self._memory_root_resolved = self.memory_root.resolve()
+        self._memory_root_str = str(self._memory_root_resolved)
+        # 预先绑定处理方法，execute中只需一次字典查找
+        self._dispatch = {command: getattr(self, name) for command, name in self._DISPATCH.items()}
+        # 按输入字符串缓存纯字符串的路径规范化结果；符号链接检查依赖文件系统状态，每次都重新执行
+        self._normalized_paths = functools.lru_cache(maxsize=1024)(self._normalize_memory_path)
+        # 最近查看的文件内容：路径 -> (mtime_ns, 大小, 内容)，按LRU顺序淘汰
+        self._view_cache: OrderedDict[str, tuple[tuple[int, ...], int, str]] = OrderedDict()
+        self._view_cache_bytes = 0
 
     def _validate_path(self, path: str) -> Path:
         """
         验证并解析记忆路径以防止目录遍历攻击。
 
+        前缀检查和路径规范化只依赖输入字符串，结果会被缓存；符号链接检查每次调用都重新执行，
+        因为目录随时可能被替换为指向外部的链接。
+
         参数:
             path: 要验证的路径（必须以/memories开头）
 
@@ -45,31 +108,116 @@ class MemoryToolHandler:
         异常:
             ValueError: 如果路径无效或尝试逃逸记忆目录
         """
-        if not path.startswith("/memories"):
+        # 最常见的根目录路径无需验证
+        if path == self._PREFIX:
+            return self._memory_root_resolved
+
+        relative_path, full_path = self._normalized_paths(path)
+        self._reject_symlinks(path, relative_path)
+        return full_path
+
+    def _normalize_memory_path(self, path: str) -> tuple[str, Path]:
+        """
+        检查前缀并按字符串规范化路径，不访问文件系统。
+
+        返回:
+            (规范化后相对于/memories的路径, memory_root内的绝对路径) 的元组
+
+        异常:
+            ValueError: 如果路径无效或规范化后逃逸记忆目录
+        """
+        # 前缀之后必须是路径分隔符，拒绝/memoriesEVIL这类仅前缀相同的路径
+        if not path.startswith(self._PREFIX) or (
+            len(path) > self._PREFIX_LEN and path[self._PREFIX_LEN] != "/"
+        ):
             raise ValueError(
                 f"Path must start with /memories, got: {path}. "
                 "All memory operations must be confined to the /memories directory."
             )
 
         # 移除/memories前缀和任何前导斜杠
-        relative_path = path[len("/memories") :].lstrip("/")
-
-        # 解析为memory_root内的绝对路径
-        if relative_path:
-            full_path = (self.memory_root / relative_path).resolve()
-        else:
-            full_path = self.memory_root.resolve()
-
-        # 验证解析的路径仍在memory_root内
-        try:
-            full_path.relative_to(self.memory_root.resolve())
-        except ValueError as e:
+        relative_path = path[self._PREFIX_LEN :].lstrip("/")
+        if not relative_path:
+            return relative_path, self._memory_root_resolved
+
+        # 按字符串规范化消除..组件；后续的文件操作使用规范化后的路径，因此_reject_symlinks
+        # 必须检查规范化后的组件，而不是原始输入中的组件
+        full_path = os.path.normpath(os.path.join(self._memory_root_str, relative_path))
+
+        # 验证规范化后的路径仍在memory_root内
+        if full_path == self._memory_root_str:
+            return "", self._memory_root_resolved
+        if not full_path.startswith(self._memory_root_str + os.sep):
             raise ValueError(
                 f"Path '{path}' would escape /memories directory. "
                 "Directory traversal attempts are not allowed."
-            ) from e
+            )
 
-        return full_path
+        return full_path[len(self._memory_root_str) + 1 :], Path(full_path)
+
+    def _reject_symlinks(self, path: str, relative_path: str) -> None:
+        """
+        对规范化路径中已存在的每个组件执行lstat，遇到符号链接时抛出ValueError。
+
+        relative_path必须已规范化（不含..组件），否则不存在的组件之后的链接会被跳过。
+        """
+        current = self.memory_root
+        for part in Path(relative_path).parts:
+            current = current / part
+            try:
+                mode = os.lstat(current).st_mode
+            except (FileNotFoundError, NotADirectoryError):
+                # 此组件不存在，其后的组件也不可能是已存在的链接
+                return
+            if stat.S_ISLNK(mode):
+                raise ValueError(
+                    f"Path '{path}' contains a symbolic link. "
+                    "Symbolic links are not allowed in /memories."
+                )
+
+    @staticmethod
+    def _file_signature(st: os.stat_result) -> tuple[int, ...]:
+        """
+        判断缓存内容是否仍有效的文件签名。
+
+        除修改时间和大小外还包含inode和ctime：外部替换文件会改变inode，原地改写后即使
+        修改时间被还原，ctime也会变化。
+        """
+        return (st.st_ino, st.st_mtime_ns, st.st_ctime_ns, st.st_size)
+
+    def _cached_content(self, key: str) -> tuple[str | None, os.stat_result]:
+        """返回缓存的文件内容（文件签名变化时为None）以及文件当前的stat结果。"""
+        st = os.stat(key)
+        cached = self._view_cache.get(key)
+        if cached is not None and cached[0] == self._file_signature(st):
+            self._view_cache.move_to_end(key)
+            return cached[2], st
+        return None, st
+
+    def _cache_content(self, key: str, st: os.stat_result, content: str) -> None:
+        """缓存文件内容，超出总大小上限时淘汰最久未使用的条目。"""
+        self._forget_content(key)
+        if st.st_size > self._VIEW_CACHE_MAX_BYTES:
+            return
+        self._view_cache[key] = (self._file_signature(st), st.st_size, content)
+        self._view_cache_bytes += st.st_size
+        while self._view_cache_bytes > self._VIEW_CACHE_MAX_BYTES:
+            _, (_, size, _) = self._view_cache.popitem(last=False)
+            self._view_cache_bytes -= size
+
+    def _forget_content(self, key: str | None = None) -> None:
+        """使指定文件的缓存内容失效；不指定时清空整个缓存。"""
+        if key is None:
+            self._view_cache.clear()
+            self._view_cache_bytes = 0
+            return
+        cached = self._view_cache.pop(key, None)
+        if cached is not None:
+            self._view_cache_bytes -= cached[1]
+
+    def _invalidate_caches(self) -> None:
+        """目录结构变化（删除、重命名、清空）后清除文件内容缓存。"""
+        self._forget_content()
 
     def execute(self, **params: Any) -> dict[str, str]:
         """
@@ -91,75 +239,87 @@ class MemoryToolHandler:
         """
         command = params.get("command")
 
+        handler = self._dispatch.get(command)
+        if handler is None:
+            return {
+                "error": f"Unknown command: '{command}'. "
+                f"Valid commands are: {', '.join(self._DISPATCH)}"
+            }
+
         try:
-            if command == "view":
-                return self._view(params)
-            elif command == "create":
-                return self._create(params)
-            elif command == "str_replace":
-                return self._str_replace(params)
-            elif command == "insert":
-                return self._insert(params)
-            elif command == "delete":
-                return self._delete(params)
-            elif command == "rename":
-                return self._rename(params)
-            else:
-                return {
-                    "error": f"Unknown command: '{command}'. "
-                    "Valid commands are: view, create, str_replace, insert, delete, rename"
-                }
+            # 参数直接按关键字传给处理方法；command等无关参数由**_吸收
+            return handler(**params)
         except ValueError as e:
             return {"error": str(e)}
         except Exception as e:
             return {"error": f"Unexpected error executing {command}: {e}"}
 
-    def _view(self, params: dict[str, Any]) -> dict[str, str]:
+    def _view(
+        self, *, path: str | None = None, view_range: list[int] | None = None, **_: Any
+    ) -> dict[str, str]:
         """查看目录内容或文件内容。"""
-        path = params.get("path")
-        view_range = params.get("view_range")
 
         if not path:
-            return {"error": "Missing required parameter: path"}
+            return _ERR_MISSING_PATH
 
         full_path = self._validate_path(path)
 
         # 处理目录列表
         if full_path.is_dir():
             try:
-                items = []
-                for item in sorted(full_path.iterdir()):
-                    if item.name.startswith("."):
-                        continue
-                    items.append(f"{item.name}/" if item.is_dir() else item.name)
-
-                if not items:
+                # DirEntry.is_dir使用readdir返回的类型信息，无需对每个条目再做stat
+                with os.scandir(full_path) as it:
+                    entries = sorted(
+                        (entry for entry in it if not entry.name.startswith(".")),
+                        key=lambda entry: entry.name,
+                    )
+                if not entries:
                     return {"success": f"Directory: {path}\n(empty)"}
 
-                return {
-                    "success": f"Directory: {path}\n" + "\n".join([f"- {item}" for item in items])
-                }
+                lines = (
+                    f"- {entry.name}/" if entry.is_dir(follow_symlinks=False) else f"- {entry.name}"
+                    for entry in entries
+                )
+                return {"success": f"Directory: {path}\n" + "\n".join(lines)}
             except Exception as e:
                 return {"error": f"Cannot read directory {path}: {e}"}
 
         # 处理文件读取
         elif full_path.is_file():
             try:
-                content = full_path.read_text(encoding="utf-8")
-                lines = content.splitlines()
+                # 文件自上次查看后未修改时直接使用缓存的内容
+                key = str(full_path)
+                content, st = self._cached_content(key)
 
-                # 如果指定了查看范围，则应用它
                 if view_range:
                     start_line = max(1, view_range[0]) - 1  # 转换为0索引
-                    end_line = len(lines) if view_range[1] == -1 else view_range[1]
-                    lines = lines[start_line:end_line]
+                    end_line = None if view_range[1] == -1 else view_range[1]
+                    if content is None and (end_line is None or end_line >= 0):
+                        # 逐行读取并在范围结束处停止，不加载整个文件；每个物理行再按
+                        # str.splitlines拆分，与缓存路径的分行规则一致
+                        with full_path.open(encoding="utf-8") as f:
+                            parts = (part for line in f for part in line.splitlines())
+                            lines = list(itertools.islice(parts, start_line, end_line))
+                    else:
+                        # 负数结束行需要知道总行数，读取整个文件
+                        if content is None:
+                            content = full_path.read_text(encoding="utf-8")
+                            self._cache_content(key, st, content)
+                        lines = content.splitlines()[start_line:end_line]
                     start_num = start_line + 1
                 else:
+                    if content is None:
+                        content = full_path.read_text(encoding="utf-8")
+                        self._cache_content(key, st, content)
+                    lines = content.splitlines()
                     start_num = 1
 
                 # 格式化为带行号
-                numbered_lines = [f"{i + start_num:4d}: {line}" for i, line in enumerate(lines)]
-                return {"success": "\n".join(numbered_lines)}
+                return {
+                    "success": "\n".join(
+                        f"{i:4d}: {line}" for i, line in enumerate(lines, start=start_num)
+                    )
+                }
 
             except UnicodeDecodeError:
                 return {"error": f"Cannot read {path}: File is not valid UTF-8 text"}
@@ -169,18 +329,16 @@ class MemoryToolHandler:
         else:
             return {"error": f"Path not found: {path}"}
 
-    def _create(self, params: dict[str, Any]) -> dict[str, str]:
+    def _create(self, *, path: str | None = None, file_text: str = "", **_: Any) -> dict[str, str]:
         """创建或覆盖文件。"""
-        path = params.get("path")
-        file_text = params.get("file_text", "")
 
         if not path:
-            return {"error": "Missing required parameter: path"}
+            return _ERR_MISSING_PATH
 
         full_path = self._validate_path(path)
 
         # 不允许直接创建目录
-        if not path.endswith((".txt", ".md", ".json", ".py", ".yaml", ".yml")):
+        if os.path.splitext(path)[1] not in self._ALLOWED_EXTS:
             return {
                 "error": f"Cannot create {path}: Only text files are supported. "
                 "Use file extensions: .txt, .md, .json, .py, .yaml, .yml"
@@ -190,21 +348,131 @@ class MemoryToolHandler:
             # 如果需要，创建父目录
             full_path.parent.mkdir(parents=True, exist_ok=True)
 
-            # 写入文件
-            full_path.write_text(file_text, encoding="utf-8")
+            # 写入文件：直接写入UTF-8字节，不经过文本模式的换行转换（与编辑命令的写回方式一致）
+            full_path.write_bytes(file_text.encode("utf-8"))
+            self._forget_content(str(full_path))
             return {"success": f"File created successfully at {path}"}
 
         except Exception as e:
             return {"error": f"Cannot create file {path}: {e}"}
 
-    def _str_replace(self, params: dict[str, Any]) -> dict[str, str]:
+    @staticmethod
+    def _read_for_edit(full_path: Path) -> tuple[int, str]:
+        """
+        以读写模式打开文件并一次读取全部内容，供编辑命令原地改写。
+
+        参数:
+            full_path: 已验证的文件路径
+
+        返回:
+            (文件描述符, 文本内容) 的元组；调用方负责关闭文件描述符
+        """
+        fd = os.open(full_path, os.O_RDWR | getattr(os, "O_BINARY", 0))
+        try:
+            size = os.fstat(fd).st_size
+            data = os.read(fd, size)
+            # 常规文件通常一次即可读完，短读时继续读取剩余部分
+            while len(data) < size:
+                chunk = os.read(fd, size - len(data))
+                if not chunk:
+                    break
+                data += chunk
+            text = data.decode("utf-8")
+        except BaseException:
+            os.close(fd)
+            raise
+
+        # 与read_text的通用换行模式保持一致
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return fd, text
+
+    @staticmethod
+    def _write_for_edit(fd: int, text: str) -> None:
+        """从文件开头写入新内容，并截断多余的旧内容。"""
+        data = text.encode("utf-8")
+        os.lseek(fd, 0, os.SEEK_SET)
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view) :]
+        os.ftruncate(fd, len(data))
+
+    @staticmethod
+    def _find_unique(content: Any, old: Any) -> tuple[int, int]:
+        """
+        查找old在content中的位置并判断是否唯一，适用于str、bytes和mmap。
+
+        找到第一次出现后只需确认其后没有第二次出现；仅在不唯一时才统计确切次数。
+
+        返回:
+            (第一次出现的位置, 出现次数) 的元组
+        """
+        first = content.find(old)
+        if first < 0:
+            return first, 0
+        if content.find(old, max(first + len(old), first + 1)) < 0:
+            return first, 1
+        return first, content[:].count(old)
+
+    @staticmethod
+    def _match_error(path: str, count: int) -> dict[str, str]:
+        """old_str未找到或不唯一时的错误结果。"""
+        if count == 0:
+            return {"error": f"String not found in {path}. The exact text must exist in the file."}
+        return {
+            "error": f"String appears {count} times in {path}. "
+            "The string must be unique. Use more specific context."
+        }
+
+    @classmethod
+    def _is_valid_utf8(cls, data: Any) -> bool:
+        """分块增量解码以验证data是有效的UTF-8，不会一次生成整个文件的字符串。"""
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        try:
+            for start in range(0, len(data), cls._MMAP_THRESHOLD):
+                decoder.decode(data[start : start + cls._MMAP_THRESHOLD])
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            return False
+        return True
+
+    def _str_replace_mapped(
+        self, full_path: Path, path: str, old_str: str, new_str: str
+    ) -> dict[str, str] | None:
+        """
+        通过mmap在字节层面为大文件执行替换，查找时不把整个文件读入并解码。
+
+        UTF-8是自同步编码，编码后的old_str只会在字符边界处匹配。文件包含\r或不是有效的UTF-8
+        时返回None，由调用方使用文本路径处理（规范化换行或报告解码错误）。
+        """
+        old = old_str.encode("utf-8")
+        with full_path.open("r+b") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm.find(b"\r") >= 0 or not self._is_valid_utf8(mm):
+                    return None
+                first, count = self._find_unique(mm, old)
+                if count != 1:
+                    return self._match_error(path, count)
+                new_data = mm[:first] + new_str.encode("utf-8") + mm[first + len(old) :]
+            # 映射关闭后再写回并截断（Windows不允许截断仍被映射的文件）
+            f.seek(0)
+            f.write(new_data)
+            f.truncate()
+        self._forget_content(str(full_path))
+        return {"success": f"File {path} has been edited successfully"}
+
+    def _str_replace(
+        self,
+        *,
+        path: str | None = None,
+        old_str: str | None = None,
+        new_str: str = "",
+        **_: Any,
+    ) -> dict[str, str]:
         """替换文件中的文本。"""
-        path = params.get("path")
-        old_str = params.get("old_str")
-        new_str = params.get("new_str", "")
 
         if not path or old_str is None:
-            return {"error": "Missing required parameters: path, old_str"}
+            return _ERR_MISSING_STR_REPLACE
 
         full_path = self._validate_path(path)
 
@@ -212,37 +480,44 @@ class MemoryToolHandler:
             return {"error": f"File not found: {path}"}
 
         try:
-            content = full_path.read_text(encoding="utf-8")
-
-            # 检查old_str是否存在
-            count = content.count(old_str)
-            if count == 0:
-                return {
-                    "error": f"String not found in {path}. The exact text must exist in the file."
-                }
-            elif count > 1:
-                return {
-                    "error": f"String appears {count} times in {path}. "
-                    "The string must be unique. Use more specific context."
-                }
-
-            # 执行替换
-            new_content = content.replace(old_str, new_str, 1)
-            full_path.write_text(new_content, encoding="utf-8")
+            # 大文件使用mmap查找，避免整体读取和解码
+            if full_path.stat().st_size >= self._MMAP_THRESHOLD:
+                result = self._str_replace_mapped(full_path, path, old_str, new_str)
+                if result is not None:
+                    return result
+
+            # 读取和写回共用同一个文件描述符
+            fd, content = self._read_for_edit(full_path)
+            try:
+                # 检查old_str是否存在且唯一
+                first, count = self._find_unique(content, old_str)
+                if count != 1:
+                    return self._match_error(path, count)
+
+                # 执行替换
+                end = first + len(old_str)
+                self._write_for_edit(fd, content[:first] + new_str + content[end:])
+                self._forget_content(str(full_path))
+            finally:
+                os.close(fd)
 
             return {"success": f"File {path} has been edited successfully"}
 
         except Exception as e:
             return {"error": f"Cannot edit file {path}: {e}"}
 
-    def _insert(self, params: dict[str, Any]) -> dict[str, str]:
+    def _insert(
+        self,
+        *,
+        path: str | None = None,
+        insert_line: int | None = None,
+        insert_text: str = "",
+        **_: Any,
+    ) -> dict[str, str]:
         """在特定行插入文本。"""
-        path = params.get("path")
-        insert_line = params.get("insert_line")
-        insert_text = params.get("insert_text", "")
 
         if not path or insert_line is None:
-            return {"error": "Missing required parameters: path, insert_line"}
+            return _ERR_MISSING_INSERT
 
         full_path = self._validate_path(path)
 
@@ -250,70 +525,70 @@ class MemoryToolHandler:
             return {"error": f"File not found: {path}"}
 
         try:
-            lines = full_path.read_text(encoding="utf-8").splitlines()
-
-            # 验证插入行
-            if insert_line < 0 or insert_line > len(lines):
-                return {
-                    "error": f"Invalid insert_line {insert_line}. "
-                    f"Must be between 0 and {len(lines)}"
-                }
-
-            # 插入文本
-            lines.insert(insert_line, insert_text.rstrip("\n"))
-
-            # 写回
-            full_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+            # 读取和写回共用同一个文件描述符
+            fd, content = self._read_for_edit(full_path)
+            try:
+                # 与_view相同按str.splitlines分行，insert_line与view显示的行号一致；
+                # 保留各行原有的换行符，写回的文件总以换行结尾
+                lines = content.splitlines(keepends=True)
+                if lines and lines[-1].splitlines()[0] == lines[-1]:
+                    lines[-1] += "\n"
+
+                # 验证插入行
+                if insert_line < 0 or insert_line > len(lines):
+                    return {
+                        "error": f"Invalid insert_line {insert_line}. "
+                        f"Must be between 0 and {len(lines)}"
+                    }
+
+                # 插入文本并写回
+                lines.insert(insert_line, insert_text.rstrip("\n") + "\n")
+                self._write_for_edit(fd, "".join(lines))
+                self._forget_content(str(full_path))
+            finally:
+                os.close(fd)
 
             return {"success": f"Text inserted at line {insert_line} in {path}"}
 
         except Exception as e:
             return {"error": f"Cannot insert into {path}: {e}"}
 
-    def _delete(self, params: dict[str, Any]) -> dict[str, str]:
+    def _delete(self, *, path: str | None = None, **_: Any) -> dict[str, str]:
         """删除文件或目录。"""
-        path = params.get("path")
 
         if not path:
-            return {"error": "Missing required parameter: path"}
+            return _ERR_MISSING_PATH
 
         # 防止删除根记忆目录
         if path == "/memories":
-            return {"error": "Cannot delete the /memories directory itself"}
+            return _ERR_DELETE_ROOT
 
+        # _validate_path已确保路径位于/memories内，越界时抛出ValueError
         full_path = self._validate_path(path)
 
-        # 验证路径在/memories内，以防止在记忆目录外意外删除
-        # 这提供了超出_validate_path的额外安全检查
-        try:
-            full_path.relative_to(self.memory_root.resolve())
-        except ValueError:
-            return {
-                "error": f"Invalid operation: Path '{path}' is not within /memories directory. "
-                "Only paths within /memories can be deleted."
-            }
-
         if not full_path.exists():
             return {"error": f"Path not found: {path}"}
 
         try:
             if full_path.is_file():
                 full_path.unlink()
+                self._invalidate_caches()
                 return {"success": f"File deleted: {path}"}
             elif full_path.is_dir():
                 shutil.rmtree(full_path)
+                self._invalidate_caches()
                 return {"success": f"Directory deleted: {path}"}
 
         except Exception as e:
             return {"error": f"Cannot delete {path}: {e}"}
 
-    def _rename(self, params: dict[str, Any]) -> dict[str, str]:
+    def _rename(
+        self, *, old_path: str | None = None, new_path: str | None = None, **_: Any
+    ) -> dict[str, str]:
         """重命名或移动文件/目录。"""
-        old_path = params.get("old_path")
-        new_path = params.get("new_path")
 
         if not old_path or not new_path:
-            return {"error": "Missing required parameters: old_path, new_path"}
+            return _ERR_MISSING_RENAME
 
         old_full_path = self._validate_path(old_path)
         new_full_path = self._validate_path(new_path)
@@ -333,6 +608,7 @@ class MemoryToolHandler:
 
             # 执行重命名/移动
             old_full_path.rename(new_full_path)
+            self._invalidate_caches()
 
             return {"success": f"Renamed {old_path} to {new_path}"}
 
@@ -352,9 +628,12 @@ class MemoryToolHandler:
             带有成功消息的字典
         """
         try:
+            # 只清空内容，保留memory_root本身，无需删除后重新创建
             if self.memory_root.exists():
-                shutil.rmtree(self.memory_root)
-            self.memory_root.mkdir(parents=True, exist_ok=True)
-            return {"success": "All memory cleared successfully"}
+                _clear_directory(self.memory_root)
+            else:
+                self.memory_root.mkdir(parents=True, exist_ok=True)
+            self._invalidate_caches()
+            return _OK_CLEARED
         except Exception as e:
             return {"error": f"Cannot clear memory: {e}"}
@@ -4,6 +4,7 @@
 测试安全验证、命令执行和错误处理。
 """
 
+import os
 import shutil
 import tempfile
 import unittest
@@ -15,9 +16,19 @@ from memory_tool import MemoryToolHandler
 class TestMemoryToolHandler(unittest.TestCase):
     """MemoryToolHandler 测试套件。"""
 
+    @classmethod
+    def setUpClass(cls):
+        """创建整个测试类共用的根临时目录；Linux 上放在内存文件系统 /dev/shm 中。"""
+        cls._root = tempfile.mkdtemp(dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+
+    @classmethod
+    def tearDownClass(cls):
+        """清理根临时目录。"""
+        shutil.rmtree(cls._root)
+
     def setUp(self):
-        """为每个测试创建临时目录。"""
-        self.test_dir = tempfile.mkdtemp()
+        """为每个测试在根目录下创建临时目录。"""
+        self.test_dir = tempfile.mkdtemp(dir=self._root)
         self.handler = MemoryToolHandler(base_path=self.test_dir)
 
     def tearDown(self):
@@ -32,6 +43,12 @@ class TestMemoryToolHandler(unittest.TestCase):
         self.assertIn("error", result)
         self.assertIn("must start with /memories", result["error"])
 
+    def test_path_validation_rejects_prefix_lookalike(self):
+        """测试拒绝仅以 /memories 字符串开头的路径。"""
+        result = self.handler.execute(command="create", path="/memoriesEVIL/x.txt", file_text="x")
+        self.assertIn("error", result)
+        self.assertIn("must start with /memories", result["error"])
+
     def test_path_validation_prevents_traversal_dotdot(self):
         """测试阻止 .. 路径遍历。"""
         result = self.handler.execute(command="view", path="/memories/../../../etc/passwd")
@@ -44,6 +61,57 @@ class TestMemoryToolHandler(unittest.TestCase):
         # 路径将被处理并应通过验证失败
         self.assertIn("error", result)
 
+    def test_path_validation_rejects_symlinks(self):
+        """测试拒绝 /memories 内指向外部的符号链接。"""
+        outside_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, outside_dir)
+        (Path(outside_dir) / "secret.txt").write_text("secret")
+        (Path(self.test_dir) / "memories" / "link").symlink_to(outside_dir)
+
+        result = self.handler.execute(command="view", path="/memories/link/secret.txt")
+        self.assertIn("error", result)
+        self.assertIn("symbolic link", result["error"])
+
+    def test_path_validation_rejects_symlinks_after_parent_reference(self):
+        """测试不存在的组件或文件之后的 .. 不能绕过符号链接检查。"""
+        outside_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, outside_dir)
+        (Path(outside_dir) / "secret.txt").write_text("secret")
+        (Path(self.test_dir) / "memories" / "link").symlink_to(outside_dir)
+        self.handler.execute(command="create", path="/memories/file.txt", file_text="x")
+
+        for prefix in ("/memories/nope/..", "/memories/file.txt/.."):
+            with self.subTest(prefix=prefix):
+                result = self.handler.execute(command="view", path=f"{prefix}/link/secret.txt")
+                self.assertIn("error", result)
+                self.assertIn("symbolic link", result["error"])
+
+                result = self.handler.execute(
+                    command="create", path=f"{prefix}/link/new.txt", file_text="pwned"
+                )
+                self.assertIn("error", result)
+                self.assertIn("symbolic link", result["error"])
+
+        self.assertEqual(os.listdir(outside_dir), ["secret.txt"])
+
+    def test_path_validation_rejects_directory_swapped_for_symlink(self):
+        """测试目录在验证过一次后被替换为符号链接时仍会被拒绝。"""
+        outside_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, outside_dir)
+        (Path(outside_dir) / "secret.txt").write_text("secret")
+        self.handler.execute(command="create", path="/memories/sub/secret.txt", file_text="ok")
+        self.assertIn(
+            "success", self.handler.execute(command="view", path="/memories/sub/secret.txt")
+        )
+
+        sub_dir = Path(self.test_dir) / "memories" / "sub"
+        shutil.rmtree(sub_dir)
+        sub_dir.symlink_to(outside_dir)
+
+        result = self.handler.execute(command="view", path="/memories/sub/secret.txt")
+        self.assertIn("error", result)
+        self.assertIn("symbolic link", result["error"])
+
     def test_path_validation_allows_valid_paths(self):
         """测试接受有效的内存路径。"""
         result = self.handler.execute(command="create", path="/memories/test.txt", file_text="test")
@@ -91,6 +159,50 @@ class TestMemoryToolHandler(unittest.TestCase):
         self.assertNotIn("line 1", result["success"])
         self.assertNotIn("line 4", result["success"])
 
+    def test_view_range_independent_of_cache(self):
+        """测试范围查看在缓存命中前后使用相同的分行规则和负数结束行。"""
+        content = "line 1\x0cline 2\u2028line 3\nline 4\nline 5"
+        self.handler.execute(command="create", path="/memories/test.txt", file_text=content)
+
+        for view_range in ([2, 4], [1, -2], [3, -1]):
+            handler = MemoryToolHandler(base_path=self.test_dir)
+            uncached = handler.execute(
+                command="view", path="/memories/test.txt", view_range=view_range
+            )
+            handler.execute(command="view", path="/memories/test.txt")
+            cached = handler.execute(
+                command="view", path="/memories/test.txt", view_range=view_range
+            )
+            self.assertEqual(uncached, cached)
+
+        result = self.handler.execute(command="view", path="/memories/test.txt", view_range=[1, -2])
+        self.assertEqual(result["success"], "   1: line 1\n   2: line 2\n   3: line 3")
+
+    def test_view_cache_invalidated_by_external_write(self):
+        """测试外部以相同大小改写文件并还原修改时间后，view 不返回缓存的旧内容。"""
+        self.handler.execute(command="create", path="/memories/test.txt", file_text="old")
+        self.assertEqual(
+            self.handler.execute(command="view", path="/memories/test.txt")["success"], "   1: old"
+        )
+
+        full_path = Path(self.test_dir) / "memories" / "test.txt"
+        st = full_path.stat()
+        full_path.write_text("new", encoding="utf-8")
+        os.utime(full_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        self.assertEqual(
+            self.handler.execute(command="view", path="/memories/test.txt")["success"], "   1: new"
+        )
+
+        # 用同样大小和修改时间的另一个文件替换
+        st = full_path.stat()
+        replacement = full_path.with_name("replacement.txt")
+        replacement.write_text("alt", encoding="utf-8")
+        os.utime(replacement, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(replacement, full_path)
+        self.assertEqual(
+            self.handler.execute(command="view", path="/memories/test.txt")["success"], "   1: alt"
+        )
+
     def test_view_nonexistent_path(self):
         """测试查看不存在的路径。"""
         result = self.handler.execute(command="view", path="/memories/notfound.txt")
@@ -202,6 +314,35 @@ class TestMemoryToolHandler(unittest.TestCase):
         self.assertIn("error", result)
         self.assertIn("not found", result["error"].lower())
 
+    def test_str_replace_large_file(self):
+        """测试大文件（mmap 路径）的替换。"""
+        filler = "填充\n" * MemoryToolHandler._MMAP_THRESHOLD
+        content = filler + "unique marker\n" + filler
+        self.handler.execute(command="create", path="/memories/big.txt", file_text=content)
+
+        result = self.handler.execute(
+            command="str_replace",
+            path="/memories/big.txt",
+            old_str="unique marker",
+            new_str="替换后",
+        )
+        self.assertIn("success", result)
+        full_path = Path(self.test_dir) / "memories" / "big.txt"
+        self.assertEqual(full_path.read_text(encoding="utf-8"), filler + "替换后\n" + filler)
+
+    def test_str_replace_large_file_invalid_utf8(self):
+        """测试大文件包含无效 UTF-8 字节时返回错误且不修改文件。"""
+        data = b"a" * MemoryToolHandler._MMAP_THRESHOLD + b"\xff old\n"
+        full_path = Path(self.test_dir) / "memories" / "big.txt"
+        full_path.write_bytes(data)
+
+        result = self.handler.execute(
+            command="str_replace", path="/memories/big.txt", old_str="old", new_str="new"
+        )
+        self.assertIn("error", result)
+        self.assertIn("utf-8", result["error"].lower())
+        self.assertEqual(full_path.read_bytes(), data)
+
     # 插入命令测试
 
     def test_insert_at_beginning(self):
@@ -252,6 +393,26 @@ class TestMemoryToolHandler(unittest.TestCase):
         )
         self.assertIn("success", result)
 
+    def test_insert_uses_view_line_numbers(self):
+        """测试插入行号与 view 的行号一致（包括 \\n 以外的行分隔符）。"""
+        for insert_line, expected in ((1, "a\x0cX\nb\u2028c\nd\n"), (4, "a\x0cb\u2028c\nd\nX\n")):
+            with self.subTest(insert_line=insert_line):
+                self.handler.execute(
+                    command="create", path="/memories/test.txt", file_text="a\x0cb\u2028c\nd"
+                )
+                result = self.handler.execute(
+                    command="insert",
+                    path="/memories/test.txt",
+                    insert_line=insert_line,
+                    insert_text="X",
+                )
+                self.assertIn("success", result)
+                full_path = Path(self.test_dir) / "memories" / "test.txt"
+                self.assertEqual(full_path.read_text(encoding="utf-8"), expected)
+
+        view = self.handler.execute(command="view", path="/memories/test.txt", view_range=[5, 5])
+        self.assertEqual(view["success"], "   5: X")
+
     def test_insert_invalid_line(self):
         """测试使用无效行号插入。"""
         self.handler.execute(command="create", path="/memories/test.txt", file_text="line 1")